@@ -0,0 +1,38 @@
+"""
+Pytest configuration for the Smart Attendance System
+"""
+
+import pytest
+
+
+def pytest_configure(config):
+    """Register custom markers."""
+    config.addinivalue_line(
+        "markers", "hardware: test needs physical devices such as a camera"
+    )
+
+
+@pytest.fixture
+def app_config(tmp_path):
+    """Config whose data, FAQ and log files all live under tmp_path."""
+    from src.utils.config import Config
+    
+    config = Config(str(tmp_path / "config.json"))
+    config.update_config(
+        database_file=str(tmp_path / "data" / "attendance.db"),
+        student_images_folder=str(tmp_path / "data" / "student_images"),
+        faq_file=str(tmp_path / "data" / "faq.json"),
+        log_file=str(tmp_path / "logs" / "system.log")
+    )
+    return config
+
+
+@pytest.fixture(params=[True, False], ids=["upsert", "update-then-insert"])
+def sqlite_upsert(request, monkeypatch):
+    """Run a database test with and without SQLite's UPSERT syntax (3.24+)."""
+    from src.utils import database
+    
+    if request.param and not database.UPSERT_SUPPORTED:
+        pytest.skip("SQLite is older than 3.24")
+    monkeypatch.setattr(database, "UPSERT_SUPPORTED", request.param)
+    return request.param
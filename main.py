@@ -5,6 +5,7 @@ Main entry point for the application.
 
 import sys
 import os
+import logging
 from src.attendance_system import AttendanceSystem
 from src.chatbot import FAQChatbot
 from src.utils.logger import setup_logging
@@ -62,10 +63,15 @@ def main():
                 break
             except Exception as e:
                 print(f"❌ An error occurred: {e}")
+        
+        db_manager.close()
                 
     except Exception as e:
         print(f"❌ Failed to initialize system: {e}")
         sys.exit(1)
+    finally:
+        # Flush buffered log records to the log file
+        logging.shutdown()
 
 def show_settings(config):
     """Display system settings and configuration."""
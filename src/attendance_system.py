@@ -4,15 +4,27 @@ Face recognition-based attendance system module
 
 import cv2
 import face_recognition
+import hashlib
 import numpy as np
 import os
-import pickle
+import sqlite3
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional, Set
+from typing import List, Dict, Tuple, Optional
 import logging
 from .utils.database import DatabaseManager
 from .utils.logger import AttendanceLogger
+from .utils.camera import FrameGrabber
+from .utils import fast_distance
+
+# Face label (background color, status text) keyed by is_marked
+LABEL_STYLES = {
+    True: ((0, 255, 0), "✓ Marked"),  # Green for already marked
+    False: ((255, 0, 0), "New"),  # Blue for new detection
+}
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
 
 
 class AttendanceSystem:
@@ -28,21 +40,35 @@ class AttendanceSystem:
         self.config = config
         self.logger = AttendanceLogger("attendance")
         self.db_manager = DatabaseManager(config.database_file)
-        self.known_encodings = []
-        self.known_names = []
-        self.marked_students: Set[str] = set()
+        self._matcher = None  # GPU or faiss backend, built at session start
+        self._detection_model = config.face_recognition_model  # may switch to cnn per session
+        self._reset_known_encodings()
+        self._marked_mask = 0  # bit i set when student id i is marked present
         self.session_id = None
         self.session_start_time = None
         
-    def load_student_encodings(self) -> Tuple[List, List]:
+        # Reused detection buffers, sized on the first processed frame
+        self._bgr_small: Optional[np.ndarray] = None
+        self._rgb_small: Optional[np.ndarray] = None
+        
+        # Attendance rows waiting to be written to the database
+        self._pending_marks: List[Tuple] = []
+        
+        # Recognitions of the last processed frame, redrawn on skipped frames
+        self._last_draws: List[Tuple] = []
+        
+        # Pre-rendered face label sprites
+        self._name_sprites: Dict[Tuple[str, bool], Tuple[np.ndarray, int]] = {}
+        self._confidence_sprites: Dict[Tuple[int, bool], np.ndarray] = {}
+        
+    def load_student_encodings(self) -> Tuple[np.ndarray, List]:
         """
         Load face encodings for all registered students.
         
         Returns:
-            Tuple of (encodings, names) lists
+            Tuple of (encodings, names); encodings is an (N, 128) float32 matrix
         """
-        encodings = []
-        names = []
+        self._reset_known_encodings()
         
         # Ensure student images directory exists
         if not os.path.exists(self.config.student_images_folder):
@@ -50,101 +76,386 @@ class AttendanceSystem:
             self.logger.logger.warning(f"Created missing directory: {self.config.student_images_folder}")
         
         # Get all image files
-        image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
-        image_files = [f for f in os.listdir(self.config.student_images_folder) 
-                      if f.lower().endswith(image_extensions)]
+        image_entries = self._list_student_images()
         
-        if not image_files:
+        if not image_entries:
             self.logger.logger.warning(f"No images found in {self.config.student_images_folder}")
-            return encodings, names
+            return self.known_encodings, self.known_names
         
-        self.logger.logger.info(f"Loading {len(image_files)} student images...")
+        self.logger.logger.info(f"Loading {len(image_entries)} student images...")
         
-        for filename in image_files:
-            image_path = os.path.join(self.config.student_images_folder, filename)
-            student_name = os.path.splitext(filename)[0]
+        # Image decoding and dlib encoding release the GIL, so threads scale
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(self._encode_image, (entry.path for entry in image_entries))
             
-            try:
-                # Load image
-                image = face_recognition.load_image_file(image_path)
+            for entry, (face_encoding, error) in zip(image_entries, results):
+                filename = entry.name
+                student_name = os.path.splitext(filename)[0]
                 
-                # Get face encodings
-                face_encodings = face_recognition.face_encodings(image)
-                
-                if face_encodings:
-                    # Use the first (and usually only) face found
-                    encodings.append(face_encodings[0])
-                    names.append(student_name)
+                if error is not None:
+                    self.logger.logger.error(f"❌ Error processing {filename}: {error}")
+                elif face_encoding is not None:
+                    self._append_encoding(face_encoding, student_name)
                     self.logger.logger.info(f"✅ Loaded encoding for: {student_name}")
                 else:
                     self.logger.logger.warning(f"❌ No face found in: {filename}")
-                    
-            except Exception as e:
-                self.logger.logger.error(f"❌ Error processing {filename}: {e}")
         
         # Cache encodings for faster loading next time
-        self._cache_encodings(encodings, names)
+        self._cache_encodings(self.known_encodings, self.known_names,
+                              self._images_signature(image_entries))
         
-        self.logger.logger.info(f"Successfully loaded {len(encodings)} student encodings")
-        return encodings, names
+        self.logger.logger.info(f"Successfully loaded {self._known_count} student encodings")
+        return self.known_encodings, self.known_names
     
-    def _cache_encodings(self, encodings: List, names: List):
-        """Cache face encodings to disk for faster loading."""
-        cache_file = os.path.join(self.config.student_images_folder, "encodings_cache.pkl")
+    @staticmethod
+    def _encode_image(image_path: str) -> Tuple[Optional[np.ndarray], Optional[Exception]]:
+        """
+        Compute the face encoding of a single student image.
+        
+        Args:
+            image_path: Path to the student image
+            
+        Returns:
+            Tuple of (encoding, error); encoding is None if no face was found
+        """
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump((encodings, names), f)
-            self.logger.logger.info(f"Encodings cached to: {cache_file}")
+            image = face_recognition.load_image_file(image_path)
+            face_encodings = face_recognition.face_encodings(image, num_jitters=1)
         except Exception as e:
-            self.logger.logger.warning(f"Failed to cache encodings: {e}")
+            return None, e
+        
+        if not face_encodings:
+            return None, None
+        
+        # Use the first (and usually only) face found, stored as float32
+        # to halve memory traffic during matching
+        return np.asarray(face_encodings[0], dtype=np.float32), None
+    
+    def _list_student_images(self) -> List[os.DirEntry]:
+        """List student image files; DirEntry caches the name and file type."""
+        with os.scandir(self.config.student_images_folder) as it:
+            return [entry for entry in it
+                    if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)]
+    
+    def _images_signature(self, image_entries: List[os.DirEntry]) -> Dict:
+        """
+        Summarize the image folder so a stale encodings cache can be detected.
+        
+        A rename keeps the newest mtime and the image count, so the sorted
+        file names are hashed in too; the resolved folder path catches
+        student_images_folder pointing at another folder.
+        """
+        names_digest = hashlib.sha1("\0".join(sorted(entry.name for entry in image_entries)).encode("utf-8"))
+        return {
+            "folder": os.path.realpath(self.config.student_images_folder),
+            "mtime_ns": max((entry.stat().st_mtime_ns for entry in image_entries), default=0),
+            "image_count": len(image_entries),
+            "names_sha1": names_digest.hexdigest()
+        }
+    
+    def _cache_encodings(self, encodings: np.ndarray, names: List, signature: Dict):
+        """Cache face encodings through the database manager for faster loading."""
+        self.db_manager.save_encodings(names, encodings, signature)
+    
+    def _load_cached_encodings(self) -> Tuple[np.ndarray, List]:
+        """Load cached face encodings if they match the current student images."""
+        if not os.path.isdir(self.config.student_images_folder):
+            return np.empty((0, 128), dtype=np.float32), []
+        
+        signature = self._images_signature(self._list_student_images())
+        names, matrix = self.db_manager.load_encodings(signature)
+        if names:
+            self.logger.logger.info(f"Loaded cached encodings for {len(names)} students")
+        return matrix, names
+    
+    @property
+    def known_encodings(self) -> np.ndarray:
+        """Known encodings as a contiguous (N, 128) float32 matrix view."""
+        return self._known_matrix[:self._known_count]
+    
+    def _reset_known_encodings(self, capacity: int = 0):
+        """Drop all known encodings and preallocate room for capacity rows."""
+        self._known_matrix = np.empty((capacity, 128), dtype=np.float32)
+        self._known_sq = np.empty(capacity, dtype=np.float32)
+        self._known_count = 0
+        self._matcher = None
+        self.known_names = []
+        self._name_to_id: Dict[str, int] = {}
+        self._row_ids: List[int] = []
+    
+    def _set_known_encodings(self, encodings: np.ndarray, names: List):
+        """
+        Replace known encodings with an (N, 128) matrix and matching names.
+        
+        A float32 C-contiguous matrix (e.g. a memory-mapped cache) is used
+        as-is; it is only copied once an append outgrows it.
+        """
+        self._reset_known_encodings()
+        if encodings.dtype == np.float32 and encodings.flags['C_CONTIGUOUS']:
+            self._known_matrix = encodings
+        else:
+            self._known_matrix = np.ascontiguousarray(encodings, dtype=np.float32)
+        self._known_sq = np.einsum('ij,ij->i', self._known_matrix, self._known_matrix)
+        self._known_count = len(names)
+        self.known_names = list(names)
+        for name in self.known_names:
+            self._row_ids.append(self._name_to_id.setdefault(name, len(self._name_to_id)))
+    
+    def _append_encoding(self, encoding: np.ndarray, name: str):
+        """
+        Append one encoding, doubling the matrix capacity when it is full.
+        
+        Args:
+            encoding: Face encoding of shape (128,)
+            name: Student name for the encoding
+        """
+        if self._known_count == self._known_matrix.shape[0]:
+            capacity = max(16, 2 * self._known_matrix.shape[0])
+            matrix = np.empty((capacity, 128), dtype=np.float32)
+            matrix[:self._known_count] = self.known_encodings
+            sq = np.empty(capacity, dtype=np.float32)
+            sq[:self._known_count] = self._known_sq[:self._known_count]
+            self._known_matrix, self._known_sq = matrix, sq
+        
+        row = self._known_matrix[self._known_count]
+        row[:] = encoding
+        self._known_sq[self._known_count] = row @ row
+        self._known_count += 1
+        self._matcher = None
+        self.known_names.append(name)
+        self._row_ids.append(self._name_to_id.setdefault(name, len(self._name_to_id)))
     
-    def _load_cached_encodings(self) -> Tuple[List, List]:
-        """Load cached face encodings if available."""
-        cache_file = os.path.join(self.config.student_images_folder, "encodings_cache.pkl")
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'rb') as f:
-                    encodings, names = pickle.load(f)
-                self.logger.logger.info(f"Loaded cached encodings for {len(names)} students")
-                return encodings, names
-            except Exception as e:
-                self.logger.logger.warning(f"Failed to load cached encodings: {e}")
-        return [], []
+    @property
+    def marked_students(self) -> List[str]:
+        """Names of students marked present in the current session."""
+        mask = self._marked_mask
+        return [name for name, student_id in self._name_to_id.items() if (mask >> student_id) & 1]
     
-    def _recognize_face(self, face_encoding: np.ndarray) -> Tuple[Optional[str], float]:
+    def _is_marked(self, name: str) -> bool:
+        """Check whether a student is marked present in the current session."""
+        student_id = self._name_to_id.get(name)
+        return student_id is not None and bool((self._marked_mask >> student_id) & 1)
+    
+    def _present_count(self) -> int:
+        """Number of students marked present in the current session."""
+        return bin(self._marked_mask).count("1")
+    
+    def _match_faces(self, probes: np.ndarray) -> Tuple[List[int], List[float]]:
         """
-        Recognize a face using loaded encodings.
+        Match all faces of a frame with a single matrix multiply.
+        
+        Uses the GPU or faiss matcher when one is active. Otherwise a frame
+        with one face goes through the compiled best_match kernel, and larger
+        frames use one BLAS call instead of a face_distance call per face.
         
         Args:
-            face_encoding: Face encoding to recognize
+            probes: Face encodings to recognize, shape (F, 128)
             
         Returns:
-            Tuple of (student_name, confidence_score)
+            Tuple of (row_indices, confidence_scores) lists, one entry per probe;
+            the row index is -1 when no known face is within the threshold
         """
-        if not self.known_encodings:
-            return None, 0.0
+        probe_count = len(probes)
+        if probe_count == 0:
+            return [], []
+        if self._known_count == 0:
+            return [-1] * probe_count, [0.0] * probe_count
+        
+        if self._matcher is not None:
+            idx, distances = self._matcher.match(probes)
+        elif probe_count == 1:
+            best_index, best_distance_sq = fast_distance.best_match(self.known_encodings, probes[0])
+            idx, distances = (best_index,), (np.sqrt(max(best_distance_sq, 0.0)),)
+        else:
+            idx, distances = fast_distance.batch_best_match(
+                self.known_encodings, self._known_sq[:self._known_count], probes
+            )
+        
+        rows = []
+        confidences = []
+        for best_match_index, best_distance in zip(idx, distances):
+            # Convert distance to confidence (lower distance = higher confidence)
+            confidences.append(float(max(0, 1 - best_distance)))
+            
+            # Check if match is above threshold
+            if best_distance <= self.config.face_threshold:
+                rows.append(int(best_match_index))
+            else:
+                rows.append(-1)
         
-        # Calculate face distances
-        distances = face_recognition.face_distance(self.known_encodings, face_encoding)
+        return rows, confidences
+    
+    def _setup_matcher(self):
+        """Pick the fastest available matching backend for the session."""
+        self._matcher = None
+        self._detection_model = self.config.face_recognition_model
+        if not self._known_count:
+            return
+        
+        if self.config.use_gpu:
+            # dlib's CNN detector runs on CUDA when dlib was built with it
+            if fast_distance.dlib_cuda_available() and self._detection_model == "hog":
+                self._detection_model = "cnn"
+                self.logger.logger.info("dlib CUDA support found, using the cnn face detector")
+            
+            if fast_distance.CUPY_AVAILABLE:
+                try:
+                    self._matcher = fast_distance.GpuMatcher(self.known_encodings)
+                    self.logger.logger.info("Face matching runs on the GPU")
+                    return
+                except Exception as e:
+                    self.logger.logger.warning(f"GPU matching unavailable, using CPU: {e}")
+        
+        if fast_distance.FAISS_AVAILABLE:
+            self._matcher = fast_distance.FaissMatcher(self.known_encodings)
+            self.logger.logger.info("Face matching uses a faiss index")
+    
+    def _prepare_detection_frame(self, frame: np.ndarray, scale: float) -> np.ndarray:
+        """
+        Downscale a BGR frame and convert it to RGB into reused buffers.
+        
+        Args:
+            frame: Video frame in BGR order
+            scale: Resize factor applied before detection
+            
+        Returns:
+            Contiguous RGB image owned by the attendance system
+        """
+        height, width = frame.shape[:2]
+        small_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        buffer_shape = (small_size[1], small_size[0], 3)
+        
+        # (Re)allocate only when the camera resolution changes
+        if self._rgb_small is None or self._rgb_small.shape != buffer_shape:
+            self._rgb_small = np.empty(buffer_shape, dtype=np.uint8)
+            self._bgr_small = np.empty_like(self._rgb_small)
+        
+        if scale != 1.0:
+            cv2.resize(frame, small_size, dst=self._bgr_small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._bgr_small, cv2.COLOR_BGR2RGB, dst=self._rgb_small)
+        else:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_small)
         
-        # Find the best match
-        best_match_index = distances.argmin()
-        best_distance = distances[best_match_index]
+        return self._rgb_small
+    
+    def _process_recognitions(self, face_locations: List[Tuple], rows: List[int],
+                              confidences: List[float]) -> List[Tuple]:
+        """
+        Mark attendance for recognized faces of a processed frame.
         
-        # Convert distance to confidence (lower distance = higher confidence)
-        confidence = max(0, 1 - best_distance)
+        Args:
+            face_locations: Face locations in full-frame coordinates
+            rows: Matched encoding rows (-1 for unknown faces)
+            confidences: Recognition confidences
+            
+        Returns:
+            List of (face_location, name, confidence, is_marked) tuples to draw
+        """
+        draws = []
+        timestamp = None  # formatted once per frame, on the first new mark
+        for face_location, row, confidence in zip(face_locations, rows, confidences):
+            if row >= 0:
+                name = self.known_names[row]
+                student_bit = 1 << self._row_ids[row]
+                is_already_marked = bool(self._marked_mask & student_bit)
+                
+                # Mark attendance if not already marked; the database write
+                # is buffered and flushed in batches
+                if not is_already_marked:
+                    if timestamp is None:
+                        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    self._pending_marks.append(
+                        (name, timestamp, "Present", self.session_id, confidence)
+                    )
+                    self._marked_mask |= student_bit
+                    print(f"✅ {name} marked present (confidence: {confidence:.2f})")
+                    self.logger.log_attendance_marked(name, timestamp)
+                
+                draws.append((face_location, name, confidence, is_already_marked))
+            else:
+                # Unknown face
+                self.logger.log_unknown_face()
+                draws.append((face_location, None, confidence, False))
         
-        # Check if match is above threshold
-        if best_distance <= self.config.face_threshold:
-            return self.known_names[best_match_index], confidence
+        return draws
+    
+    @staticmethod
+    def _render_label(text: str, color: Tuple[int, int, int], font_scale: float,
+                      baseline_y: int, height: int) -> np.ndarray:
+        """
+        Render white text on a solid background into a small BGR sprite.
         
-        return None, confidence
+        Args:
+            text: Label text
+            color: Background color
+            font_scale: Hershey font scale
+            baseline_y: Text baseline inside the sprite
+            height: Sprite height in pixels
+            
+        Returns:
+            Sprite image of shape (height, text_width + 4, 3)
+        """
+        (text_width, _), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 1)
+        sprite = np.empty((height, text_width + 4, 3), dtype=np.uint8)
+        sprite[:] = color
+        cv2.putText(sprite, text, (0, baseline_y), 
+                   cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), 1)
+        return sprite
+    
+    def _get_name_sprite(self, name: str, is_marked: bool) -> Tuple[np.ndarray, int]:
+        """Get the cached (label sprite, name text width) pair for a student."""
+        key = (name, is_marked)
+        cached = self._name_sprites.get(key)
+        if cached is None:
+            color, status_text = LABEL_STYLES[is_marked]
+            name_part = self._render_label(f"{name} ", color, 0.5, 15, 20)
+            status_part = self._render_label(status_text, color, 0.4, 15, 20)
+            
+            # Stack the name line above the status line on one background
+            width = max(name_part.shape[1], status_part.shape[1])
+            sprite = np.empty((40, width, 3), dtype=np.uint8)
+            sprite[:] = color
+            sprite[:20, :name_part.shape[1]] = name_part
+            sprite[20:, :status_part.shape[1]] = status_part
+            
+            # The confidence sprite goes right after the name text
+            cached = self._name_sprites[key] = (sprite, name_part.shape[1])
+        return cached
+    
+    def _get_confidence_sprite(self, confidence: float, is_marked: bool) -> np.ndarray:
+        """Get the cached confidence sprite, quantized to 0.05 steps."""
+        step = int(round(min(max(confidence, 0.0), 1.0) * 20))
+        key = (step, is_marked)
+        sprite = self._confidence_sprites.get(key)
+        if sprite is None:
+            color, _ = LABEL_STYLES[is_marked]
+            sprite = self._render_label(f"({step / 20:.2f})", color, 0.5, 15, 20)
+            self._confidence_sprites[key] = sprite
+        return sprite
+    
+    @staticmethod
+    def _blit(frame: np.ndarray, sprite: np.ndarray, top: int, left: int, right: int):
+        """Copy a sprite onto frame at (top, left), clipped to right and frame edges."""
+        frame_height, frame_width = frame.shape[:2]
+        y0, x0 = max(top, 0), max(left, 0)
+        y1 = min(top + sprite.shape[0], frame_height)
+        x1 = min(left + sprite.shape[1], right, frame_width)
+        if y0 < y1 and x0 < x1:
+            frame[y0:y1, x0:x1] = sprite[y0 - top:y1 - top, x0 - left:x1 - left]
+    
+    def _flush_pending_marks(self):
+        """Write buffered attendance marks to the database in one batch."""
+        if self._pending_marks and self.db_manager.mark_attendance_batch(self._pending_marks):
+            self._pending_marks = []
     
     def _draw_face_info(self, frame: np.ndarray, face_location: Tuple, 
                        name: str, confidence: float, is_marked: bool = False):
         """
         Draw face recognition information on frame.
         
+        Labels are pre-rendered sprites, so drawing them is a slice copy
+        instead of rasterizing glyphs on every frame.
+        
         Args:
             frame: Video frame
             face_location: Face location coordinates (top, right, bottom, left)
@@ -153,14 +464,7 @@ class AttendanceSystem:
             is_marked: Whether attendance is already marked
         """
         top, right, bottom, left = face_location
-        
-        # Choose color based on status
-        if is_marked:
-            color = (0, 255, 0)  # Green for already marked
-            status_text = "✓ Marked"
-        else:
-            color = (255, 0, 0)  # Blue for new detection
-            status_text = "New"
+        color, _ = LABEL_STYLES[is_marked]
         
         # Draw rectangle around face
         cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
@@ -168,13 +472,24 @@ class AttendanceSystem:
         # Draw background for text
         cv2.rectangle(frame, (left, bottom - 40), (right, bottom), color, cv2.FILLED)
         
-        # Draw name and status
-        text = f"{name} ({confidence:.2f})"
-        cv2.putText(frame, text, (left + 4, bottom - 25), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        # Draw name, confidence and status
+        name_sprite, name_width = self._get_name_sprite(name, is_marked)
+        self._blit(frame, name_sprite, bottom - 40, left + 4, right)
+        self._blit(frame, self._get_confidence_sprite(confidence, is_marked),
+                   bottom - 40, left + 4 + name_width, right)
+    
+    def _draw_unknown_face(self, frame: np.ndarray, face_location: Tuple):
+        """
+        Draw an unknown face marker on frame.
         
-        cv2.putText(frame, status_text, (left + 4, bottom - 5), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+        Args:
+            frame: Video frame
+            face_location: Face location coordinates (top, right, bottom, left)
+        """
+        top, right, bottom, left = face_location
+        cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 2)
+        cv2.putText(frame, "Unknown", (left, top - 10), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
     
     def _draw_stats(self, frame: np.ndarray, marked_count: int, total_count: int):
         """
@@ -207,18 +522,27 @@ class AttendanceSystem:
         print("\n🎯 Starting Smart Attendance System...")
         
         # Try to load cached encodings first
-        self.known_encodings, self.known_names = self._load_cached_encodings()
+        encodings, names = self._load_cached_encodings()
         
         # If no cached encodings, load from images
-        if not self.known_encodings:
-            self.known_encodings, self.known_names = self.load_student_encodings()
+        if names:
+            self._set_known_encodings(encodings, names)
+        else:
+            self.load_student_encodings()
         
-        if not self.known_encodings:
+        if not self.known_names:
             print("❌ No student data found!")
             print(f"📁 Please add student face images to: {self.config.student_images_folder}")
             print("💡 Image files should be named with student names (e.g., 'John_Doe.jpg')")
             return
         
+        self._setup_matcher()
+        
+        # Single-face frames use the best_match kernel when no GPU/faiss
+        # matcher is active; compile it now so the first frame isn't delayed
+        if self._matcher is None:
+            fast_distance.warm_up(self.known_encodings)
+        
         # Initialize camera
         cap = cv2.VideoCapture(self.config.camera_index)
         if not cap.isOpened():
@@ -226,6 +550,14 @@ class AttendanceSystem:
             self.logger.log_system_error("Camera access failed", "start_attendance")
             return
         
+        # Keep a single driver buffer so reads never return stale frames, and
+        # request MJPG, which most USB cameras compress in hardware
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        mjpg = cv2.VideoWriter_fourcc(*'MJPG')
+        cap.set(cv2.CAP_PROP_FOURCC, mjpg)
+        if int(cap.get(cv2.CAP_PROP_FOURCC)) != mjpg:
+            self.logger.logger.info("Camera does not support MJPG, using its default format")
+        
         # Set camera properties for better performance
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
@@ -234,7 +566,9 @@ class AttendanceSystem:
         # Initialize session
         self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.session_start_time = datetime.now()
-        self.marked_students.clear()
+        self._marked_mask = 0
+        self._pending_marks = []
+        self.db_manager.begin_session(self.session_id)
         
         self.logger.log_attendance_session_start(len(self.known_names))
         
@@ -247,60 +581,72 @@ class AttendanceSystem:
         print("• Press 'r' to reset marked students")
         print("• Press 's' to save current attendance")
         
-        # Main attendance loop
-        frame_count = 0
+        # Main attendance loop; bounded tick counters replace a frame count
+        process_tick = 0
+        flush_tick = 0
         process_every_n_frames = 2  # Process every 2nd frame for better performance
+        flush_every_n_frames = 30  # Write buffered attendance about once a second
+        scale = self.config.detection_downscale
+        self._last_draws = []
+        
+        # Capture on a background thread so camera I/O overlaps recognition
+        grabber = FrameGrabber(cap)
+        grabber.start()
         
         try:
             while True:
-                ret, frame = cap.read()
-                if not ret:
-                    self.logger.log_system_error("Failed to read camera frame", "attendance_loop")
-                    break
+                frame = grabber.get_latest()
+                if frame is None:
+                    if grabber.failed:
+                        self.logger.log_system_error("Failed to read camera frame", "attendance_loop")
+                        break
+                    
+                    # A slow first frame or a brief USB stall is not a failure
+                    self.logger.logger.warning("Timed out waiting for a camera frame")
+                    continue
                 
-                frame_count += 1
+                process_tick += 1
+                flush_tick += 1
                 
                 # Process frame for face recognition
-                if frame_count % process_every_n_frames == 0:
-                    # Convert BGR to RGB for face_recognition
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    rgb_frame = np.ascontiguousarray(rgb_frame)
+                if process_tick == process_every_n_frames:
+                    process_tick = 0
                     
-                    # Find face locations and encodings
-                    face_locations = face_recognition.face_locations(
-                        rgb_frame, model=self.config.face_recognition_model
-                    )
-                    face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+                    # Detect on a downscaled RGB copy; detector cost is O(pixels)
+                    rgb_small = self._prepare_detection_frame(frame, scale)
                     
-                    # Process each detected face
-                    for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-                        name, confidence = self._recognize_face(face_encoding)
+                    # Find face locations; skip the encoder when nobody is in view
+                    small_locations = face_recognition.face_locations(
+                        rgb_small, model=self._detection_model
+                    )
+                    if small_locations:
+                        face_encodings = face_recognition.face_encodings(rgb_small, small_locations)
+                        
+                        # Map detections back to full-frame coordinates for drawing
+                        face_locations = [
+                            tuple(int(round(coord / scale)) for coord in location)
+                            for location in small_locations
+                        ]
                         
-                        if name:
-                            is_already_marked = name in self.marked_students
-                            
-                            # Mark attendance if not already marked
-                            if not is_already_marked:
-                                success = self.db_manager.mark_attendance(
-                                    name, "Present", self.session_id, confidence
-                                )
-                                if success:
-                                    self.marked_students.add(name)
-                                    print(f"✅ {name} marked present (confidence: {confidence:.2f})")
-                                    self.logger.log_attendance_marked(name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                            
-                            # Draw face information
-                            self._draw_face_info(frame, (top, right, bottom, left), 
-                                               name, confidence, is_already_marked)
-                        else:
-                            # Unknown face
-                            cv2.rectangle(frame, (left, top), (right, bottom), (0, 0, 255), 2)
-                            cv2.putText(frame, "Unknown", (left, top - 10), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-                            self.logger.log_unknown_face()
+                        # Recognize all detected faces in one batch
+                        rows, confidences = self._match_faces(np.asarray(face_encodings))
+                        self._last_draws = self._process_recognitions(face_locations, rows, confidences)
+                    else:
+                        self._last_draws = []
+                
+                if flush_tick == flush_every_n_frames:
+                    flush_tick = 0
+                    self._flush_pending_marks()
+                
+                # Redraw the latest recognitions; skipped frames reuse them as-is
+                for face_location, name, confidence, is_marked in self._last_draws:
+                    if name:
+                        self._draw_face_info(frame, face_location, name, confidence, is_marked)
+                    else:
+                        self._draw_unknown_face(frame, face_location)
                 
                 # Draw statistics
-                self._draw_stats(frame, len(self.marked_students), len(self.known_names))
+                self._draw_stats(frame, self._present_count(), len(self.known_names))
                 
                 # Display frame
                 cv2.imshow('Smart Attendance System', frame)
@@ -321,27 +667,35 @@ class AttendanceSystem:
             print(f"❌ An error occurred: {e}")
         finally:
             # Cleanup
+            grabber.stop()
             cap.release()
             cv2.destroyAllWindows()
+            self._flush_pending_marks()
             self._finalize_session()
+            self.db_manager.close()
     
     def _reset_attendance(self):
         """Reset marked students for current session."""
-        self.marked_students.clear()
+        self._marked_mask = 0
         print("🔄 Attendance reset - all students can be marked again")
     
     def _save_current_attendance(self):
         """Save current attendance progress."""
-        if not self.marked_students:
+        self._flush_pending_marks()
+        
+        if not self._marked_mask:
             print("📝 No attendance marked yet")
             return
         
+        # Format the timestamp once for every student row
+        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
         session_data = {
             "session_id": self.session_id,
             "start_time": self.session_start_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": now_str,
             "total_students": len(self.known_names),
-            "present_count": len(self.marked_students),
+            "present_count": self._present_count(),
             "students": {}
         }
         
@@ -349,15 +703,15 @@ class AttendanceSystem:
         for student in self.marked_students:
             session_data["students"][student] = {
                 "status": "Present",
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                "timestamp": now_str
             }
         
         # Add absent students
         for student in self.known_names:
-            if student not in self.marked_students:
+            if not self._is_marked(student):
                 session_data["students"][student] = {
                     "status": "Absent",
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    "timestamp": now_str
                 }
         
         # Save report
@@ -367,50 +721,62 @@ class AttendanceSystem:
     
     def _finalize_session(self):
         """Finalize attendance session and generate reports."""
-        if not self.marked_students:
+        if not self._marked_mask:
             print("📝 No attendance was marked in this session")
             return
         
+        # Format the timestamp once for every student row
+        end_time = datetime.now()
+        now_str = end_time.strftime("%Y-%m-%d %H:%M:%S")
+        present_count = self._present_count()
+        
         # Create final session data
         session_data = {
             "session_id": self.session_id,
             "start_time": self.session_start_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "end_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": now_str,
             "total_students": len(self.known_names),
-            "present_count": len(self.marked_students),
+            "present_count": present_count,
             "students": {}
         }
         
         # Mark all students (present and absent)
+        rows = []
         for student in self.known_names:
-            if student in self.marked_students:
+            if self._is_marked(student):
                 status = "Present"
             else:
                 status = "Absent"
             
             session_data["students"][student] = {
                 "status": status,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                "timestamp": now_str
             }
-            
-            # Save to database
-            self.db_manager.mark_attendance(student, status, self.session_id)
+            rows.append((student, now_str, status, self.session_id, None))
         
-        # Save final report
-        report_file = self.db_manager.save_attendance_report(session_data, self.config.save_reports_format)
+        # Save the rows and the final report under one transaction; a failed
+        # insert rolls the rows back and skips the report
+        try:
+            with self.db_manager.transaction():
+                self.db_manager.mark_attendance_batch(rows)
+                report_file = self.db_manager.save_attendance_report(session_data, self.config.save_reports_format)
+        except sqlite3.Error as e:
+            self.logger.log_system_error(str(e), "finalize_session")
+            print(f"❌ Failed to save attendance session: {e}")
+            return
         
         # Log session completion
-        self.logger.log_attendance_session_end(len(self.marked_students), len(self.known_names))
+        self.logger.log_attendance_session_end(present_count, len(self.known_names))
         
         # Display summary
         print("\n" + "=" * 50)
         print("📊 ATTENDANCE SESSION COMPLETED")
         print("=" * 50)
         print(f"👥 Total Students: {len(self.known_names)}")
-        print(f"✅ Present: {len(self.marked_students)}")
-        print(f"❌ Absent: {len(self.known_names) - len(self.marked_students)}")
-        print(f"📈 Attendance Rate: {(len(self.marked_students)/len(self.known_names))*100:.1f}%")
-        print(f"⏱️  Session Duration: {datetime.now() - self.session_start_time}")
+        print(f"✅ Present: {present_count}")
+        print(f"❌ Absent: {len(self.known_names) - present_count}")
+        print(f"📈 Attendance Rate: {(present_count/len(self.known_names))*100:.1f}%")
+        print(f"⏱️  Session Duration: {end_time - self.session_start_time}")
         
         if report_file:
             print(f"💾 Report saved: {report_file}")
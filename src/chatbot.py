@@ -2,18 +2,190 @@
 Rule-based FAQ chatbot module
 """
 
+import copy
+import importlib.util
 import json
 import os
+import random
 import re
 import time
+from collections import Counter
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 import logging
+import numpy as np
 from .utils.logger import ChatbotLogger
+from .utils import json_io
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# numba is only imported when find_best_match_batch first runs; importing it
+# here would add hundreds of milliseconds to every chatbot start
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# Runs of anything other than word characters; replacing them with a single
+# space strips punctuation and collapses whitespace in one pass
+_CLEAN_RE = re.compile(r'[^\w]+')
+
+# Same cleanup for ASCII text as a translation table: every ASCII character
+# that is not a letter, digit or underscore becomes a space
+_ASCII_CLEAN_TABLE = str.maketrans({
+    chr(code): ' ' for code in range(128)
+    if not (chr(code).isalnum() or chr(code) == '_')
+})
+
+_FALLBACK_RESPONSES = (
+    "I'm not sure about that specific question. Could you try rephrasing it?",
+    "That's a good question! I don't have information about that topic yet.",
+    "I didn't understand that. Try asking about attendance, exams, or policies.",
+    "Sorry, I don't have an answer for that. Please contact student services for specific inquiries.",
+    "I'm still learning! Could you ask about attendance, grades, or campus facilities?"
+)
+
+# Fragments used to suggest a topic for unmatched queries
+_ATTENDANCE_HINTS = ("attendance", "present", "absent")
+_ACADEMIC_HINTS = ("exam", "test", "grade")
+_HELP_HINTS = ("help", "support", "contact")
+
+# FAQ entries written to a fresh faq.json
+_DEFAULT_FAQ = {
+    "attendance": {
+        "keywords": ["attendance", "present", "absent", "mark", "check"],
+        "answer": "Attendance is automatically marked using face recognition when you enter the classroom. You can check your attendance records on the student portal.",
+        "category": "attendance"
+    },
+    "exam schedule": {
+        "keywords": ["exam", "schedule", "date", "time", "when"],
+        "answer": "Exam schedules are available on the academic calendar and student portal. Please check the official website for the most up-to-date information.",
+        "category": "academic"
+    },
+    "leave policy": {
+        "keywords": ["leave", "absence", "sick", "emergency", "permission"],
+        "answer": "Leave requests must be submitted through the student portal at least 24 hours in advance. Emergency leaves require immediate notification to the academic office.",
+        "category": "policies"
+    },
+    "makeup exam": {
+        "keywords": ["makeup", "retake", "resit", "missed exam"],
+        "answer": "Makeup exams require prior approval from the academic office. You must submit a valid reason with supporting documents within 48 hours of the original exam.",
+        "category": "academic"
+    },
+    "attendance report": {
+        "keywords": ["report", "record", "history", "percentage"],
+        "answer": "Your attendance reports are available on the student portal. You can view daily, weekly, and monthly attendance summaries.",
+        "category": "attendance"
+    },
+    "grades": {
+        "keywords": ["grade", "marks", "score", "result", "gpa"],
+        "answer": "Grades and results are published on the student portal within 2 weeks after each exam. You can also request a grade review if needed.",
+        "category": "academic"
+    },
+    "library": {
+        "keywords": ["library", "book", "borrow", "return", "fine"],
+        "answer": "The library is open Monday to Friday 8 AM to 8 PM, Saturday 9 AM to 5 PM. You can borrow up to 5 books for 2 weeks. Late returns incur fines.",
+        "category": "facilities"
+    },
+    "cafeteria": {
+        "keywords": ["cafeteria", "food", "lunch", "meal", "dining"],
+        "answer": "The cafeteria serves breakfast (7-9 AM), lunch (12-2 PM), and dinner (6-8 PM). You can pay with student ID card or cash.",
+        "category": "facilities"
+    },
+    "parking": {
+        "keywords": ["parking", "vehicle", "car", "bike", "space"],
+        "answer": "Student parking is available in designated areas. A parking permit is required and can be obtained from the security office.",
+        "category": "facilities"
+    },
+    "contact": {
+        "keywords": ["contact", "help", "support", "phone", "email"],
+        "answer": "For general inquiries, contact the student services office at (555) 123-4567 or email studentservices@university.edu. For technical issues, contact IT support.",
+        "category": "support"
+    }
+}
+
+# Synonym groups used to widen keyword matches
+_DEFAULT_SYNONYMS = {
+    "attendance": ["attendance", "present", "absent", "mark", "check", "roll call"],
+    "exam": ["exam", "test", "quiz", "assessment", "evaluation"],
+    "leave": ["leave", "absence", "sick", "emergency", "permission", "holiday"],
+    "grade": ["grade", "marks", "score", "result", "gpa", "points"],
+    "library": ["library", "book", "borrow", "return", "fine", "catalog"],
+    "food": ["food", "cafeteria", "lunch", "meal", "dining", "eat"],
+    "parking": ["parking", "vehicle", "car", "bike", "space", "garage"],
+    "help": ["help", "support", "contact", "phone", "email", "assistance"]
+}
+
+
+# Compiled batch scoring kernel; None until first use, False without numba
+_score_batch_kernel = None
+
+
+def _get_score_batch_kernel():
+    """Import numba and compile the batch scoring kernel on first use."""
+    global _score_batch_kernel
+    if _score_batch_kernel is None:
+        try:
+            from numba import njit, prange
+        except ImportError:
+            _score_batch_kernel = False
+            return None
+        
+        # No fastmath: scores must round exactly like find_best_match
+        @njit(parallel=True, cache=True)
+        def kernel(indptr, indices, keyword_hits, synonym_hits, keyword_count,
+                   out_rows, out_scores):
+            n_entries = keyword_count.shape[0]
+            
+            for q in prange(indptr.shape[0] - 1):
+                keyword_totals = np.zeros(n_entries)
+                synonym_totals = np.zeros(n_entries)
+            
+                # Sum the hit rows of the words present in this query
+                for j in range(indptr[q], indptr[q + 1]):
+                    word = indices[j]
+                    for f in range(n_entries):
+                        keyword_totals[f] += keyword_hits[word, f]
+                        synonym_totals[f] += synonym_hits[word, f]
+            
+                # Score and argmax in one pass; the first entry wins ties
+                best_row = -1
+                best = 0.0
+                for f in range(n_entries):
+                    score = keyword_totals[f] / keyword_count[f]
+                    for _ in range(int(synonym_totals[f])):
+                        score += 0.5 / keyword_count[f]
+                    if score > best:
+                        best = score
+                        best_row = f
+            
+                out_rows[q] = best_row
+                out_scores[q] = best
+        
+        _score_batch_kernel = kernel
+    return _score_batch_kernel or None
 
 
 class FAQChatbot:
     """Rule-based FAQ chatbot for student queries."""
     
+    # Helpful context appended to answers, by FAQ category
+    _CATEGORY_TIPS = {
+        "attendance": "\n\n💡 Tip: Make sure to face the camera clearly for accurate attendance marking.",
+        "academic": "\n\n📚 Check the student portal for the latest academic information.",
+        "policies": "\n\n📋 For detailed policies, visit the student handbook."
+    }
+    
+    _ICONS = {
+        "attendance": "📸",
+        "academic": "📚",
+        "policies": "📋",
+        "facilities": "🏫",
+        "support": "🆘",
+        "general": "💬"
+    }
+    
     def __init__(self, config):
         """
         Initialize FAQ chatbot.
@@ -22,11 +194,53 @@ class FAQChatbot:
             config: Configuration object
         """
         self.config = config
-        self.logger = ChatbotLogger("chatbot")
-        self.faq_data = {}
-        self.synonyms = {}
-        self.load_faq_data()
-        self.load_synonyms()
+        
+        # FAQ data, synonyms, logger and index are created on first use
+        self._logger: Optional[ChatbotLogger] = None
+        self._faq_data: Optional[Dict[str, Dict]] = None
+        self._synonyms: Optional[Dict[str, List[str]]] = None
+        self._index_ready = False
+        self._index: Dict[str, List[Tuple[str, int, int]]] = {}
+        self._keyword_sets: Dict[str, frozenset] = {}
+        self._syn_groups: Dict[str, frozenset] = {}
+        self._syn_index: Dict[str, Tuple[str, ...]] = {}
+        self._keyword_count: Dict[str, int] = {}
+        self._faq_order: Dict[str, int] = {}
+        self._automaton = None
+        self._category_cache: Optional[Counter] = None
+        self._batch_matrices: Optional[Tuple[Dict[str, int], np.ndarray, np.ndarray, np.ndarray]] = None
+        self._compute_response = lru_cache(maxsize=1024)(self._match_response)
+    
+    @property
+    def logger(self) -> ChatbotLogger:
+        """Chatbot event logger."""
+        if self._logger is None:
+            self._logger = ChatbotLogger("chatbot")
+        return self._logger
+    
+    @property
+    def faq_data(self) -> Dict[str, Dict]:
+        """FAQ entries keyed by question, loaded from the FAQ file on first access."""
+        if self._faq_data is None:
+            self.load_faq_data()
+        return self._faq_data
+    
+    @faq_data.setter
+    def faq_data(self, value: Dict[str, Dict]):
+        self._faq_data = value
+        self._invalidate_index()
+    
+    @property
+    def synonyms(self) -> Dict[str, List[str]]:
+        """Synonym groups, loaded on first access."""
+        if self._synonyms is None:
+            self.load_synonyms()
+        return self._synonyms
+    
+    @synonyms.setter
+    def synonyms(self, value: Dict[str, List[str]]):
+        self._synonyms = value
+        self._invalidate_index()
     
     def load_faq_data(self) -> Dict[str, str]:
         """
@@ -39,8 +253,7 @@ class FAQChatbot:
             self._create_default_faq()
         
         try:
-            with open(self.config.faq_file, 'r', encoding='utf-8') as f:
-                self.faq_data = json.load(f)
+            self.faq_data = json_io.load_file(self.config.faq_file)
             
             self.logger.log_faq_loaded(len(self.faq_data))
             return self.faq_data
@@ -52,74 +265,104 @@ class FAQChatbot:
     
     def _create_default_faq(self):
         """Create default FAQ data if file doesn't exist."""
-        self.faq_data = {
-            "attendance": {
-                "keywords": ["attendance", "present", "absent", "mark", "check"],
-                "answer": "Attendance is automatically marked using face recognition when you enter the classroom. You can check your attendance records on the student portal.",
-                "category": "attendance"
-            },
-            "exam schedule": {
-                "keywords": ["exam", "schedule", "date", "time", "when"],
-                "answer": "Exam schedules are available on the academic calendar and student portal. Please check the official website for the most up-to-date information.",
-                "category": "academic"
-            },
-            "leave policy": {
-                "keywords": ["leave", "absence", "sick", "emergency", "permission"],
-                "answer": "Leave requests must be submitted through the student portal at least 24 hours in advance. Emergency leaves require immediate notification to the academic office.",
-                "category": "policies"
-            },
-            "makeup exam": {
-                "keywords": ["makeup", "retake", "resit", "missed exam"],
-                "answer": "Makeup exams require prior approval from the academic office. You must submit a valid reason with supporting documents within 48 hours of the original exam.",
-                "category": "academic"
-            },
-            "attendance report": {
-                "keywords": ["report", "record", "history", "percentage"],
-                "answer": "Your attendance reports are available on the student portal. You can view daily, weekly, and monthly attendance summaries.",
-                "category": "attendance"
-            },
-            "grades": {
-                "keywords": ["grade", "marks", "score", "result", "gpa"],
-                "answer": "Grades and results are published on the student portal within 2 weeks after each exam. You can also request a grade review if needed.",
-                "category": "academic"
-            },
-            "library": {
-                "keywords": ["library", "book", "borrow", "return", "fine"],
-                "answer": "The library is open Monday to Friday 8 AM to 8 PM, Saturday 9 AM to 5 PM. You can borrow up to 5 books for 2 weeks. Late returns incur fines.",
-                "category": "facilities"
-            },
-            "cafeteria": {
-                "keywords": ["cafeteria", "food", "lunch", "meal", "dining"],
-                "answer": "The cafeteria serves breakfast (7-9 AM), lunch (12-2 PM), and dinner (6-8 PM). You can pay with student ID card or cash.",
-                "category": "facilities"
-            },
-            "parking": {
-                "keywords": ["parking", "vehicle", "car", "bike", "space"],
-                "answer": "Student parking is available in designated areas. A parking permit is required and can be obtained from the security office.",
-                "category": "facilities"
-            },
-            "contact": {
-                "keywords": ["contact", "help", "support", "phone", "email"],
-                "answer": "For general inquiries, contact the student services office at (555) 123-4567 or email studentservices@university.edu. For technical issues, contact IT support.",
-                "category": "support"
-            }
-        }
+        self.faq_data = copy.deepcopy(_DEFAULT_FAQ)
         
         self._save_faq_data()
         self.logger.logger.info("Created default FAQ data")
     
     def load_synonyms(self):
         """Load synonyms for better keyword matching."""
-        self.synonyms = {
-            "attendance": ["attendance", "present", "absent", "mark", "check", "roll call"],
-            "exam": ["exam", "test", "quiz", "assessment", "evaluation"],
-            "leave": ["leave", "absence", "sick", "emergency", "permission", "holiday"],
-            "grade": ["grade", "marks", "score", "result", "gpa", "points"],
-            "library": ["library", "book", "borrow", "return", "fine", "catalog"],
-            "food": ["food", "cafeteria", "lunch", "meal", "dining", "eat"],
-            "parking": ["parking", "vehicle", "car", "bike", "space", "garage"],
-            "help": ["help", "support", "contact", "phone", "email", "assistance"]
+        self.synonyms = copy.deepcopy(_DEFAULT_SYNONYMS)
+    
+    def _build_synonym_index(self):
+        """Map every synonym to the names of the synonym groups containing it."""
+        self._syn_groups = {name: frozenset(group) for name, group in self.synonyms.items()}
+        
+        syn_index: Dict[str, List[str]] = {}
+        for name, group in self._syn_groups.items():
+            for word in group:
+                syn_index.setdefault(word, []).append(name)
+        
+        self._syn_index = {word: tuple(names) for word, names in syn_index.items()}
+    
+    def _invalidate_index(self):
+        """Drop the index and every cache derived from FAQ data or synonyms."""
+        self._index_ready = False
+        self._category_cache = None
+        self._batch_matrices = None
+        self._compute_response.cache_clear()
+    
+    def _ensure_index(self):
+        """Build the inverted index if FAQ data or synonyms changed since the last build."""
+        if not self._index_ready:
+            self._build_index()
+    
+    def _build_index(self):
+        """
+        Build the inverted index used by find_best_match.
+        
+        Maps every keyword and synonym to the FAQ entries it scores for, as
+        (faq_key, keyword_hits, synonym_hits). Hits are kept as integers and
+        turned into a score once per query, so the result does not depend on
+        the order query words are visited in.
+        
+        Keyword sets are kept in a side table rather than on the FAQ entries
+        so they never end up in the saved JSON.
+        """
+        self._build_synonym_index()
+        
+        index: Dict[str, Dict[str, List[int]]] = {}
+        self._keyword_sets = {
+            key: frozenset(data.get("keywords", ())) for key, data in self.faq_data.items()
+        }
+        self._keyword_count = {
+            key: max(len(keywords), 1) for key, keywords in self._keyword_sets.items()
         }
+        
+        for key, keywords in self._keyword_sets.items():
+            # Synonym groups sharing at least one word with the keywords
+            group_names = set()
+            
+            for keyword in keywords:
+                index.setdefault(keyword, {}).setdefault(key, [0, 0])[0] += 1
+                group_names.update(self._syn_index.get(keyword, ()))
+            
+            for name in group_names:
+                for word in self._syn_groups[name]:
+                    index.setdefault(word, {}).setdefault(key, [0, 0])[1] += 1
+        
+        self._index = {
+            word: [(key, hits[0], hits[1]) for key, hits in entries.items()]
+            for word, entries in index.items()
+        }
+        self._faq_order = {key: position for position, key in enumerate(self.faq_data)}
+        self._automaton = self._build_automaton()
+        self._index_ready = True
+    
+    def _build_automaton(self):
+        """
+        Build an Aho-Corasick automaton over the indexed words.
+        
+        Words are stored padded with spaces so they only match whole tokens of
+        a preprocessed query; words containing whitespace can never match a
+        single token and are skipped.
+        
+        Returns:
+            ahocorasick.Automaton, or None if pyahocorasick is not installed
+        """
+        if not AHOCORASICK_AVAILABLE or not self._index:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for word in self._index:
+            if word.split() == [word]:
+                automaton.add_word(f" {word} ", word)
+        
+        if len(automaton) == 0:
+            return None
+        
+        automaton.make_automaton()
+        return automaton
     
     def _save_faq_data(self):
         """Save FAQ data to file."""
@@ -127,8 +370,7 @@ class FAQChatbot:
             # Ensure directory exists
             os.makedirs(os.path.dirname(self.config.faq_file), exist_ok=True)
             
-            with open(self.config.faq_file, 'w', encoding='utf-8') as f:
-                json.dump(self.faq_data, f, indent=4, ensure_ascii=False)
+            json_io.dump_file(self.faq_data, self.config.faq_file)
                 
         except IOError as e:
             self.logger.logger.error(f"Failed to save FAQ data: {e}")
@@ -143,14 +385,11 @@ class FAQChatbot:
         Returns:
             Preprocessed query string
         """
-        # Convert to lowercase
+        # Lowercase, drop special characters and collapse whitespace
         query = query.lower()
-        
-        # Remove special characters and extra spaces
-        query = re.sub(r'[^\w\s]', ' ', query)
-        query = ' '.join(query.split())
-        
-        return query
+        if query.isascii():
+            return ' '.join(query.translate(_ASCII_CLEAN_TABLE).split())
+        return _CLEAN_RE.sub(' ', query).strip()
     
     def find_best_match(self, query: str) -> Tuple[Optional[str], float]:
         """
@@ -162,33 +401,132 @@ class FAQChatbot:
         Returns:
             Tuple of (best_match_key, confidence_score)
         """
+        self._ensure_index()
+        query_words = self._query_words(query)
+        
+        # Accumulate keyword and synonym hits per FAQ entry
+        keyword_hits = Counter()
+        synonym_hits = Counter()
+        for word in query_words:
+            for key, keyword_hit, synonym_hit in self._index.get(word, ()):
+                keyword_hits[key] += keyword_hit
+                synonym_hits[key] += synonym_hit
+        
+        if not keyword_hits:
+            return None, 0.0
+        
+        # Keyword share plus half a keyword per synonym hit
+        scores = {}
+        for key, hits in keyword_hits.items():
+            keyword_count = self._keyword_count[key]
+            score = hits / keyword_count
+            for _ in range(synonym_hits[key]):
+                score += 0.5 / keyword_count
+            scores[key] = score
+        
+        # Highest score wins; ties go to the entry listed first
+        best_match = max(scores, key=lambda key: (scores[key], -self._faq_order[key]))
+        return best_match, scores[best_match]
+    
+    def _query_words(self, query: str) -> set:
+        """Preprocess a query and return its distinct words."""
         query = self.preprocess_query(query)
-        query_words = set(query.split())
         
-        best_match = None
-        best_score = 0.0
+        if self._automaton is not None:
+            # One linear scan over the query finds every indexed token
+            return {word for _, word in self._automaton.iter(f" {query} ")}
+        return set(query.split())
+    
+    def _get_batch_matrices(self) -> Tuple[Dict[str, int], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Build the dense matrices used by find_best_match_batch.
+        
+        Built on first use from the inverted index and dropped whenever the
+        index is rebuilt.
+        
+        Returns:
+            Tuple of (vocabulary, keyword_hits, synonym_hits, keyword_count):
+            word -> row, two (vocabulary x entries) hit-count matrices with
+            entries in FAQ order, and the per-entry score denominators
+        """
+        self._ensure_index()
+        
+        if self._batch_matrices is None:
+            vocab = {word: row for row, word in enumerate(self._index)}
+            keyword_hits = np.zeros((len(vocab), len(self.faq_data)), dtype=np.float64)
+            synonym_hits = np.zeros_like(keyword_hits)
+            
+            for word, entries in self._index.items():
+                row = vocab[word]
+                for key, keyword_hit, synonym_hit in entries:
+                    keyword_hits[row, self._faq_order[key]] = keyword_hit
+                    synonym_hits[row, self._faq_order[key]] = synonym_hit
+            
+            keyword_count = np.array([self._keyword_count[key] for key in self.faq_data], dtype=np.float64)
+            self._batch_matrices = (vocab, keyword_hits, synonym_hits, keyword_count)
+        
+        return self._batch_matrices
+    
+    def find_best_match_batch(self, queries: List[str]) -> List[Tuple[Optional[str], float]]:
+        """
+        Find the best matching FAQ entry for many queries at once.
+        
+        Queries are encoded as word-presence rows and scored against every
+        entry with two matrix multiplies, or with a parallel Numba kernel when
+        numba is installed (imported and compiled on the first call). Results
+        are identical to calling find_best_match on each query.
+        
+        Args:
+            queries: User queries
+            
+        Returns:
+            List of (best_match_key, confidence_score) tuples, one per query
+        """
+        if not queries or not self.faq_data:
+            return [(None, 0.0)] * len(queries)
+        
+        vocab, keyword_hits, synonym_hits, keyword_count = self._get_batch_matrices()
+        query_columns = [
+            [vocab[word] for word in self._query_words(query) if word in vocab]
+            for query in queries
+        ]
         
-        for key, data in self.faq_data.items():
-            keywords = set(data.get("keywords", []))
+        kernel = _get_score_batch_kernel() if NUMBA_AVAILABLE else None
+        if kernel is not None:
+            # CSR-style layout of the words present in each query
+            indptr = np.zeros(len(queries) + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum([len(columns) for columns in query_columns])
+            indices = np.fromiter((c for columns in query_columns for c in columns),
+                                  dtype=np.int64, count=int(indptr[-1]))
+            best_rows = np.empty(len(queries), dtype=np.int64)
+            best_scores = np.empty(len(queries), dtype=np.float64)
+            kernel(indptr, indices, keyword_hits, synonym_hits, keyword_count,
+                   best_rows, best_scores)
+        else:
+            presence = np.zeros((len(queries), len(vocab)), dtype=np.float64)
+            for row, columns in enumerate(query_columns):
+                presence[row, columns] = 1.0
             
-            # Calculate match score
-            common_words = query_words.intersection(keywords)
-            score = len(common_words) / max(len(keywords), 1)
+            # Hit counts are small integers, so the products are exact
+            keyword_totals = presence @ keyword_hits
+            synonym_totals = presence @ synonym_hits
             
-            # Check synonyms
-            for word in query_words:
-                for synonym_group in self.synonyms.values():
-                    if word in synonym_group:
-                        for synonym in synonym_group:
-                            if synonym in keywords:
-                                score += 0.5 / max(len(keywords), 1)
-                                break
+            # Same arithmetic as find_best_match: keyword share, then 0.5/K per synonym hit
+            scores = keyword_totals / keyword_count
+            half_weight = 0.5 / keyword_count
+            for hit in range(int(synonym_totals.max())):
+                scores = np.where(synonym_totals > hit, scores + half_weight, scores)
             
-            if score > best_score:
-                best_score = score
-                best_match = key
+            # argmax returns the first maximum, i.e. the entry listed first
+            best_rows = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(queries)), best_rows]
+        
+        keys = list(self.faq_data)
         
-        return best_match, best_score
+        return [
+            (keys[row], float(score)) if score > 0 else (None, 0.0)
+            for row, score in zip(best_rows, best_scores)
+        ]
     
     def get_response(self, query: str) -> str:
         """
@@ -200,36 +538,49 @@ class FAQChatbot:
         Returns:
             Bot response
         """
-        start_time = time.time()
+        # Response times are only reported in debug logs
+        timed = self.logger.logger.isEnabledFor(logging.DEBUG)
+        start_time = time.perf_counter_ns() if timed else 0
         
         if not query.strip():
             response = "Please ask a question. I can help with attendance, exams, policies, and more!"
             self.logger.log_query(query, response)
             return response
         
-        best_match, confidence = self.find_best_match(query)
+        response = self._compute_response(self.preprocess_query(query))
         
-        if best_match and confidence > 0.3:  # Minimum confidence threshold
-            response = self.faq_data[best_match]["answer"]
-            category = self.faq_data[best_match].get("category", "general")
-            
-            # Add helpful context
-            if category == "attendance":
-                response += "\n\n💡 Tip: Make sure to face the camera clearly for accurate attendance marking."
-            elif category == "academic":
-                response += "\n\n📚 Check the student portal for the latest academic information."
-            elif category == "policies":
-                response += "\n\n📋 For detailed policies, visit the student handbook."
-            
-        else:
+        if response is None:
             response = self._get_fallback_response(query)
             self.logger.log_unknown_query(query)
         
-        response_time = time.time() - start_time
+        response_time = (time.perf_counter_ns() - start_time) / 1e9 if timed else None
         self.logger.log_query(query, response, response_time)
         
         return response
     
+    def _match_response(self, preprocessed_query: str) -> Optional[str]:
+        """
+        Build the FAQ answer for a preprocessed query.
+        
+        Wrapped in a per-instance LRU cache as _compute_response, which is
+        cleared whenever the FAQ index is rebuilt.
+        
+        Args:
+            preprocessed_query: Query as returned by preprocess_query
+            
+        Returns:
+            Answer with category tip, or None if no entry matches confidently
+        """
+        best_match, confidence = self.find_best_match(preprocessed_query)
+        
+        if not best_match or confidence <= 0.3:  # Minimum confidence threshold
+            return None
+        
+        category = self.faq_data[best_match].get("category", "general")
+        
+        # Add helpful context
+        return self.faq_data[best_match]["answer"] + self._CATEGORY_TIPS.get(category, "")
+    
     def _get_fallback_response(self, query: str) -> str:
         """
         Generate fallback response for unmatched queries.
@@ -240,28 +591,20 @@ class FAQChatbot:
         Returns:
             Fallback response
         """
-        fallback_responses = [
-            "I'm not sure about that specific question. Could you try rephrasing it?",
-            "That's a good question! I don't have information about that topic yet.",
-            "I didn't understand that. Try asking about attendance, exams, or policies.",
-            "Sorry, I don't have an answer for that. Please contact student services for specific inquiries.",
-            "I'm still learning! Could you ask about attendance, grades, or campus facilities?"
-        ]
-        
         # Simple keyword-based suggestions
         query_lower = query.lower()
         
-        if any(word in query_lower for word in ["attendance", "present", "absent"]):
+        if any(word in query_lower for word in _ATTENDANCE_HINTS):
             return "I can help with attendance questions! Ask about marking attendance, checking records, or attendance policies."
-        elif any(word in query_lower for word in ["exam", "test", "grade"]):
+        elif any(word in query_lower for word in _ACADEMIC_HINTS):
             return "I can help with academic questions! Ask about exam schedules, grades, or academic policies."
-        elif any(word in query_lower for word in ["help", "support", "contact"]):
+        elif any(word in query_lower for word in _HELP_HINTS):
             return "For immediate help, contact student services at (555) 123-4567 or visit the student portal."
         else:
-            import random
-            return random.choice(fallback_responses)
+            return random.choice(_FALLBACK_RESPONSES)
     
-    def add_faq_entry(self, question: str, answer: str, keywords: List[str], category: str = "general"):
+    def add_faq_entry(self, question: str, answer: str, keywords: List[str], category: str = "general",
+                      defer_save: bool = False):
         """
         Add a new FAQ entry.
         
@@ -270,6 +613,7 @@ class FAQChatbot:
             answer: FAQ answer
             keywords: List of keywords for matching
             category: FAQ category
+            defer_save: Skip writing the FAQ file; call flush() after a bulk import
         """
         key = question.lower().replace(" ", "_").replace("?", "")
         
@@ -279,15 +623,26 @@ class FAQChatbot:
             "category": category
         }
         
-        self._save_faq_data()
+        if not defer_save:
+            self._save_faq_data()
+        self._invalidate_index()
         self.logger.logger.info(f"Added new FAQ entry: {key}")
     
+    def flush(self):
+        """Write FAQ entries added with defer_save to disk."""
+        self._save_faq_data()
+    
+    def _category_counts(self) -> Counter:
+        """Count FAQ entries per category, cached until the FAQ data changes."""
+        if self._category_cache is None:
+            self._category_cache = Counter(
+                data.get("category", "general") for data in self.faq_data.values()
+            )
+        return self._category_cache
+    
     def get_categories(self) -> List[str]:
         """Get list of FAQ categories."""
-        categories = set()
-        for data in self.faq_data.values():
-            categories.add(data.get("category", "general"))
-        return sorted(list(categories))
+        return sorted(self._category_counts())
     
     def get_faqs_by_category(self, category: str) -> Dict[str, Dict]:
         """Get FAQ entries for a specific category."""
@@ -372,30 +727,23 @@ class FAQChatbot:
     
     def _show_categories(self):
         """Show available FAQ categories."""
-        categories = self.get_categories()
-        print(f"\n📂 Available Categories ({len(categories)}):")
+        counts = self._category_counts()
+        print(f"\n📂 Available Categories ({len(counts)}):")
         
-        for category in categories:
-            count = len(self.get_faqs_by_category(category))
+        for category in sorted(counts):
+            count = counts[category]
             icon = self._get_category_icon(category)
             print(f"   {icon} {category.title()} ({count} entries)")
     
     def _get_category_icon(self, category: str) -> str:
         """Get icon for category."""
-        icons = {
-            "attendance": "📸",
-            "academic": "📚",
-            "policies": "📋",
-            "facilities": "🏫",
-            "support": "🆘",
-            "general": "💬"
-        }
-        return icons.get(category, "💬")
+        return self._ICONS.get(category, "💬")
     
     def _show_statistics(self):
         """Show chatbot statistics."""
         total_faqs = len(self.faq_data)
-        categories = len(self.get_categories())
+        counts = self._category_counts()
+        categories = len(counts)
         
         print(f"\n📊 Chatbot Statistics:")
         print(f"   📝 Total FAQ entries: {total_faqs}")
@@ -404,8 +752,7 @@ class FAQChatbot:
         
         # Show category breakdown
         print(f"\n📈 Category Breakdown:")
-        for category in self.get_categories():
-            count = len(self.get_faqs_by_category(category))
+        for category, count in counts.most_common():
             percentage = (count / total_faqs) * 100
             icon = self._get_category_icon(category)
             print(f"   {icon} {category.title()}: {count} ({percentage:.1f}%)")
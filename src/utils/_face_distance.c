@@ -0,0 +1,103 @@
+/*
+ * Native best-match kernel for 128-D face encodings.
+ *
+ * Build (optional, loaded through ctypes by fast_distance.py):
+ *     gcc -O3 -shared -fPIC -o src/utils/_face_distance.so src/utils/_face_distance.c
+ *
+ * The AVX2/FMA path is selected at runtime; other CPUs use the scalar loop.
+ */
+
+#include <float.h>
+
+#define ENCODING_DIM 128
+
+#if defined(__x86_64__) || defined(__i386__)
+#include <immintrin.h>
+
+__attribute__((target("avx2,fma")))
+static float best_match_avx2(const float *__restrict known, const float *__restrict probe,
+                             int n, int *out_idx)
+{
+    float best = FLT_MAX;
+    int best_idx = -1;
+
+    for (int i = 0; i < n; i++) {
+        const float *row = known + (long)i * ENCODING_DIM;
+
+        /* Four independent accumulators, one per 32-float quarter */
+        __m256 acc0 = _mm256_setzero_ps();
+        __m256 acc1 = _mm256_setzero_ps();
+        __m256 acc2 = _mm256_setzero_ps();
+        __m256 acc3 = _mm256_setzero_ps();
+
+        for (int k = 0; k < 32; k += 8) {
+            __m256 d0 = _mm256_sub_ps(_mm256_loadu_ps(row + k), _mm256_loadu_ps(probe + k));
+            __m256 d1 = _mm256_sub_ps(_mm256_loadu_ps(row + 32 + k), _mm256_loadu_ps(probe + 32 + k));
+            __m256 d2 = _mm256_sub_ps(_mm256_loadu_ps(row + 64 + k), _mm256_loadu_ps(probe + 64 + k));
+            __m256 d3 = _mm256_sub_ps(_mm256_loadu_ps(row + 96 + k), _mm256_loadu_ps(probe + 96 + k));
+            acc0 = _mm256_fmadd_ps(d0, d0, acc0);
+            acc1 = _mm256_fmadd_ps(d1, d1, acc1);
+            acc2 = _mm256_fmadd_ps(d2, d2, acc2);
+            acc3 = _mm256_fmadd_ps(d3, d3, acc3);
+        }
+
+        /* Horizontal sum of the eight lanes */
+        __m256 acc = _mm256_add_ps(_mm256_add_ps(acc0, acc1), _mm256_add_ps(acc2, acc3));
+        __m128 sum = _mm_add_ps(_mm256_castps256_ps128(acc), _mm256_extractf128_ps(acc, 1));
+        sum = _mm_hadd_ps(sum, sum);
+        sum = _mm_hadd_ps(sum, sum);
+        float s = _mm_cvtss_f32(sum);
+
+        if (s < best) {
+            best = s;
+            best_idx = i;
+        }
+    }
+
+    *out_idx = best_idx;
+    return best;
+}
+#endif
+
+static float best_match_scalar(const float *__restrict known, const float *__restrict probe,
+                               int n, int *out_idx)
+{
+    float best = FLT_MAX;
+    int best_idx = -1;
+
+    for (int i = 0; i < n; i++) {
+        const float *row = known + (long)i * ENCODING_DIM;
+        float s = 0.0f;
+        for (int k = 0; k < ENCODING_DIM; k++) {
+            float d = row[k] - probe[k];
+            s += d * d;
+        }
+        if (s < best) {
+            best = s;
+            best_idx = i;
+        }
+    }
+
+    *out_idx = best_idx;
+    return best;
+}
+
+/*
+ * Find the known row closest to probe.
+ *
+ * known:   n x 128 row-major float32 matrix
+ * probe:   128 float32 values
+ * out_idx: receives the best row index, or -1 when n == 0
+ *
+ * Returns the squared Euclidean distance of the best row.
+ */
+float best_match(const float *__restrict known, const float *__restrict probe,
+                 int n, int *out_idx)
+{
+#if defined(__x86_64__) || defined(__i386__)
+    if (__builtin_cpu_supports("avx2") && __builtin_cpu_supports("fma")) {
+        return best_match_avx2(known, probe, n, out_idx);
+    }
+#endif
+    return best_match_scalar(known, probe, n, out_idx);
+}
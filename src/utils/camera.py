@@ -0,0 +1,71 @@
+"""
+Camera capture helpers for the Smart Attendance System
+"""
+
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+class FrameGrabber(threading.Thread):
+    """Background thread that keeps only the newest camera frame."""
+
+    def __init__(self, cap):
+        """
+        Initialize frame grabber.
+
+        Args:
+            cap: Opened cv2.VideoCapture to read from
+        """
+        super().__init__(name="FrameGrabber", daemon=True)
+        self.cap = cap
+        self.failed = False
+        self._latest: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Read frames until stopped, replacing any frame not yet consumed."""
+        while not self._stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                self.failed = True
+                self._frame_ready.set()
+                break
+
+            with self._lock:
+                self._latest = frame
+                self._frame_ready.set()
+
+    def get_latest(self, timeout: float = 2.0) -> Optional[np.ndarray]:
+        """
+        Wait for and return the newest unread frame.
+
+        Args:
+            timeout: Maximum seconds to wait for a frame
+
+        Returns:
+            Frame, or None on a timeout or after a read failure; only
+            the failed attribute tells the two apart
+        """
+        # After a read failure no new frame will arrive; hand out the last
+        # unread one, if any, without waiting
+        if self.failed and not self._frame_ready.is_set():
+            return None
+
+        if not self._frame_ready.wait(timeout):
+            return None
+
+        with self._lock:
+            frame = self._latest
+            self._latest = None
+            self._frame_ready.clear()
+        return frame
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the grabber thread and wait for it to exit."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -4,24 +4,45 @@ Configuration management for the Smart Attendance System
 
 import os
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from . import json_io
+
+
+DEFAULT_DETECTION_DOWNSCALE = 0.25
 
 
 class Config:
     """Configuration class to manage application settings."""
     
+    # Settings persisted to the config file, in file order
+    _KEYS = (
+        "database_file",
+        "student_images_folder",
+        "faq_file",
+        "log_file",
+        "face_threshold",
+        "log_level",
+        "attendance_session_duration",
+        "camera_index",
+        "face_recognition_model",
+        "detection_downscale",
+        "use_gpu",
+        "save_reports_format"
+    )
+    
     def __init__(self, config_file: str = "config.json"):
         """Initialize configuration with default values."""
         self.config_file = config_file
+        self._last_written: Optional[Dict[str, Any]] = None
         self._load_config()
     
     def _load_config(self):
         """Load configuration from file or create default."""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r') as f:
-                    config_data = json.load(f)
+                config_data = json_io.load_file(self.config_file)
                 self._apply_config(config_data)
+                self._last_written = dict(config_data)
             except (json.JSONDecodeError, IOError) as e:
                 print(f"Warning: Could not load config file. Using defaults. Error: {e}")
                 self._set_defaults()
@@ -40,6 +61,8 @@ class Config:
         self.attendance_session_duration = 300  # 5 minutes
         self.camera_index = 0
         self.face_recognition_model = "hog"  # or "cnn" for better accuracy but slower
+        self.detection_downscale = DEFAULT_DETECTION_DOWNSCALE  # frame scale used for face detection
+        self.use_gpu = False  # use CUDA dlib / CuPy when available
         self.save_reports_format = "csv"  # csv, json, both
     
     def _apply_config(self, config_data: Dict[str, Any]):
@@ -53,26 +76,26 @@ class Config:
         self.attendance_session_duration = config_data.get("attendance_session_duration", 300)
         self.camera_index = config_data.get("camera_index", 0)
         self.face_recognition_model = config_data.get("face_recognition_model", "hog")
+        self.detection_downscale = config_data.get("detection_downscale", DEFAULT_DETECTION_DOWNSCALE)
+        self.use_gpu = config_data.get("use_gpu", False)
         self.save_reports_format = config_data.get("save_reports_format", "csv")
+        self._validate()
+    
+    def _validate(self):
+        """Replace settings the frame loop cannot work with by their defaults."""
+        scale = self.detection_downscale
+        if isinstance(scale, bool) or not isinstance(scale, (int, float)) or not 0 < scale <= 1:
+            print(f"Warning: detection_downscale must be in (0, 1], got {scale!r}. "
+                  f"Using {DEFAULT_DETECTION_DOWNSCALE}.")
+            self.detection_downscale = DEFAULT_DETECTION_DOWNSCALE
     
     def _save_config(self):
         """Save current configuration to file."""
-        config_data = {
-            "database_file": self.database_file,
-            "student_images_folder": self.student_images_folder,
-            "faq_file": self.faq_file,
-            "log_file": self.log_file,
-            "face_threshold": self.face_threshold,
-            "log_level": self.log_level,
-            "attendance_session_duration": self.attendance_session_duration,
-            "camera_index": self.camera_index,
-            "face_recognition_model": self.face_recognition_model,
-            "save_reports_format": self.save_reports_format
-        }
+        config_data = self.get_config_dict()
         
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config_data, f, indent=4)
+            json_io.dump_file(config_data, self.config_file)
+            self._last_written = config_data
         except IOError as e:
             print(f"Warning: Could not save config file. Error: {e}")
     
@@ -81,19 +104,13 @@ class Config:
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
+        self._validate()
+        
+        # Skip the write when the file already holds these values
+        if self.get_config_dict() == self._last_written:
+            return
         self._save_config()
     
     def get_config_dict(self) -> Dict[str, Any]:
         """Get configuration as dictionary."""
-        return {
-            "database_file": self.database_file,
-            "student_images_folder": self.student_images_folder,
-            "faq_file": self.faq_file,
-            "log_file": self.log_file,
-            "face_threshold": self.face_threshold,
-            "log_level": self.log_level,
-            "attendance_session_duration": self.attendance_session_duration,
-            "camera_index": self.camera_index,
-            "face_recognition_model": self.face_recognition_model,
-            "save_reports_format": self.save_reports_format
-        }
+        return {key: getattr(self, key) for key in self._KEYS}
@@ -4,11 +4,167 @@ Database management for the Smart Attendance System
 
 import sqlite3
 import csv
-import json
 import os
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import sys
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import itemgetter
+from datetime import datetime, timedelta
+from typing import Iterator, List, Dict, Optional, Tuple
 import logging
+import numpy as np
+from . import json_io
+
+
+# Applied to every connection; journal_mode=WAL is persistent and set in initialize()
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456"
+)
+
+MEMORY_DATABASE = ":memory:"
+
+# Face encodings cache, stored next to the database file
+ENCODINGS_FILE = "student_encodings.npy"
+ENCODING_NAMES_FILE = "student_encodings.json"
+
+# Prepared statements are kept per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# ts_epoch is derived from the local-time timestamp text inside SQLite; a
+# student already recorded in the same session has that row updated, so the
+# last status written for a session wins (rows without a session never collide)
+_SQL_INSERT_ATTENDANCE = '''
+    INSERT INTO attendance (student_name, timestamp, status, session_id, confidence, ts_epoch)
+    VALUES (?1, ?2, ?3, ?4, ?5, CAST(strftime('%s', ?2, 'utc') AS INTEGER))
+    ON CONFLICT(session_id, student_name) DO UPDATE SET
+        timestamp = excluded.timestamp,
+        status = excluded.status,
+        confidence = excluded.confidence,
+        ts_epoch = excluded.ts_epoch
+'''
+
+# UPSERT needs SQLite 3.24; older libraries (e.g. Python 3.8 on Ubuntu 18.04
+# links 3.22) update the session's row and insert only when none was found
+UPSERT_SUPPORTED = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+_SQL_UPDATE_SESSION_ATTENDANCE = '''
+    UPDATE attendance
+    SET timestamp = ?2, status = ?3, confidence = ?5,
+        ts_epoch = CAST(strftime('%s', ?2, 'utc') AS INTEGER)
+    WHERE session_id = ?4 AND student_name = ?1
+'''
+
+_SQL_INSERT_ATTENDANCE_ROW = '''
+    INSERT INTO attendance (student_name, timestamp, status, session_id, confidence, ts_epoch)
+    VALUES (?1, ?2, ?3, ?4, ?5, CAST(strftime('%s', ?2, 'utc') AS INTEGER))
+'''
+
+_SQL_SELECT_STUDENT = "SELECT * FROM attendance WHERE student_name = ?"
+
+_SQL_SELECT_SESSION_STUDENTS = "SELECT student_name, status FROM attendance WHERE session_id = ?"
+
+_ATTENDANCE_COLUMNS = "id, student_name, timestamp, status, session_id, confidence, ts_epoch"
+
+# Every row of a (session_id, student_name) pair except the latest one
+_SQL_SESSION_DUPLICATES = '''
+    session_id IS NOT NULL AND id NOT IN (
+        SELECT MAX(id) FROM attendance
+        WHERE session_id IS NOT NULL
+        GROUP BY session_id, student_name
+    )
+'''
+
+_SQL_SELECT_DAILY = '''
+    SELECT * FROM attendance 
+    WHERE ts_epoch >= ? AND ts_epoch < ? 
+    ORDER BY student_name, timestamp
+'''
+
+# With a single MAX() aggregate, SQLite takes the bare status column from
+# the row holding the latest timestamp
+_SQL_SELECT_DAILY_SUMMARY = '''
+    SELECT student_name,
+           MAX(timestamp),
+           status,
+           SUM(status = 'Present') > 0
+    FROM attendance
+    WHERE ts_epoch >= ? AND ts_epoch < ?
+    GROUP BY student_name
+    ORDER BY student_name
+'''
+
+# Range delete on idx_attendance_ts
+_SQL_DELETE_BEFORE = "DELETE FROM attendance WHERE timestamp < ?"
+
+# Totals, unique students, present records and latest record in one pass
+_SQL_STATISTICS = '''
+    SELECT COUNT(*),
+           COUNT(DISTINCT student_name),
+           COALESCE(SUM(status = 'Present'), 0),
+           MAX(timestamp)
+    FROM attendance
+'''
+
+
+def _next_day(date: str) -> str:
+    """
+    Get the day after a YYYY-MM-DD date.
+    
+    Used to turn DATE(timestamp) <= date into the index-friendly
+    timestamp < next day.
+    """
+    return (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=None)
+def _record_type(columns: Tuple[str, ...]):
+    """
+    Get the namedtuple type for a result column layout.
+    
+    Cached so each distinct SELECT builds its record class only once.
+    """
+    return namedtuple("AttendanceRecord", columns)
+
+
+def _fetch_records(cursor: sqlite3.Cursor) -> List[Tuple]:
+    """Fetch all rows of an executed cursor as namedtuples named after its columns."""
+    record = _record_type(tuple(column[0] for column in cursor.description))
+    return list(map(record._make, cursor.fetchall()))
+
+
+def _upsert_rows(conn: sqlite3.Connection,
+                 rows: List[Tuple[str, str, str, Optional[str], Optional[float]]]) -> int:
+    """
+    Write attendance rows like _SQL_INSERT_ATTENDANCE without UPSERT syntax.
+    
+    Rows are applied one at a time, so a pair repeated within rows ends with
+    its last status, as it does with ON CONFLICT DO UPDATE.
+    
+    Returns:
+        Number of rows inserted or updated
+    """
+    written = 0
+    for row in rows:
+        # session_id = NULL matches nothing, so rows without a session are inserted
+        if row[3] is None or conn.execute(_SQL_UPDATE_SESSION_ATTENDANCE, row).rowcount == 0:
+            conn.execute(_SQL_INSERT_ATTENDANCE_ROW, row)
+        written += 1
+    return written
+
+
+def _day_bounds(date: str) -> Tuple[int, int]:
+    """
+    Get the local-midnight epoch seconds starting and ending a YYYY-MM-DD date.
+    
+    Used for ts_epoch >= start AND ts_epoch < end range scans.
+    """
+    start = datetime.strptime(date, "%Y-%m-%d")
+    return int(start.timestamp()), int((start + timedelta(days=1)).timestamp())
 
 
 class DatabaseManager:
@@ -19,25 +175,134 @@ class DatabaseManager:
         Initialize database manager.
         
         Args:
-            db_file: Path to SQLite database file
+            db_file: Path to SQLite database file, or ":memory:" for an
+                in-memory database that lives until close() is called
         """
         self.db_file = db_file
         self.logger = logging.getLogger("database")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        # Stored status per (session_id, student_name), checked before touching SQLite
+        self._marked: Dict[Tuple[str, str], str] = {}
+        self._tx_depth = 0  # nesting level of transaction() blocks
         self._ensure_data_dir()
     
     def _ensure_data_dir(self):
         """Ensure data directory exists."""
+        if self.db_file == MEMORY_DATABASE:
+            return
         data_dir = os.path.dirname(self.db_file)
-        if data_dir and not os.path.exists(data_dir):
+        if data_dir:
+            # One mkdir call; exist_ok covers the already-present case without a stat
             os.makedirs(data_dir, exist_ok=True)
-            self.logger.info(f"Created data directory: {data_dir}")
+    
+    def _encodings_paths(self) -> Optional[Tuple[str, str]]:
+        """Get the (matrix, names) encodings cache paths, or None for an in-memory database."""
+        if self.db_file == MEMORY_DATABASE:
+            return None
+        data_dir = os.path.dirname(self.db_file)
+        return os.path.join(data_dir, ENCODINGS_FILE), os.path.join(data_dir, ENCODING_NAMES_FILE)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a database connection with the performance PRAGMAs applied.
+        
+        Returns:
+            SQLite connection
+        """
+        conn = sqlite3.connect(self.db_file, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _conn_get(self) -> sqlite3.Connection:
+        """
+        Get the shared connection, opening it on first use.
+        
+        Callers hold self._lock while using it, since the connection may be
+        shared between threads.
+        
+        Returns:
+            SQLite connection
+        """
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            return self._conn
+    
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Hold the lock and yield the shared connection.
+        
+        Outside transaction() the block commits on success and rolls back
+        on error; inside one it joins the open transaction instead.
+        
+        Yields:
+            SQLite connection
+        """
+        with self._lock:
+            conn = self._conn_get()
+            if self._tx_depth:
+                yield conn
+            else:
+                with conn:
+                    yield conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run several operations in one BEGIN IMMEDIATE transaction.
+        
+        The write lock is taken up front and everything is committed once at
+        the end, or rolled back if the block raises. Nested transaction()
+        blocks and the methods of this class join the outermost transaction.
+        
+        Yields:
+            SQLite connection
+        """
+        with self._lock:
+            conn = self._conn_get()
+            if self._tx_depth:
+                self._tx_depth += 1
+                try:
+                    yield conn
+                finally:
+                    self._tx_depth -= 1
+                return
+            
+            marked = dict(self._marked)
+            conn.execute("BEGIN IMMEDIATE")
+            self._tx_depth = 1
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                # Statuses recorded by the rolled-back inserts were never stored
+                self._marked = marked
+                raise
+            else:
+                conn.commit()
+            finally:
+                self._tx_depth = 0
+    
+    def close(self):
+        """Close the shared connection; the next query reopens it."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
     
     def initialize(self):
         """Initialize database with required tables."""
         try:
-            with sqlite3.connect(self.db_file) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 
+                # WAL lets readers run alongside the writer and avoids an fsync per commit
+                cursor.execute("PRAGMA journal_mode=WAL")
+                
                 # Create attendance table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS attendance (
@@ -46,10 +311,20 @@ class DatabaseManager:
                         timestamp TEXT NOT NULL,
                         status TEXT NOT NULL,
                         session_id TEXT,
-                        confidence REAL
+                        confidence REAL,
+                        ts_epoch INTEGER
                     )
                 ''')
                 
+                # Databases created before ts_epoch existed: add and backfill it
+                columns = {row[1] for row in cursor.execute("PRAGMA table_info(attendance)")}
+                if "ts_epoch" not in columns:
+                    cursor.execute("ALTER TABLE attendance ADD COLUMN ts_epoch INTEGER")
+                    cursor.execute(
+                        "UPDATE attendance SET ts_epoch = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)"
+                    )
+                    self.logger.info("Added ts_epoch column to attendance table")
+                
                 # Create students table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS students (
@@ -75,6 +350,47 @@ class DatabaseManager:
                     )
                 ''')
                 
+                # Indexes for the per-student and per-day timestamp range queries
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_attendance_name_ts ON attendance(student_name, timestamp)"
+                )
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_attendance_ts ON attendance(timestamp)"
+                )
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_attendance_epoch ON attendance(ts_epoch)"
+                )
+                
+                # One row per student per session; rows without a session are not affected.
+                # Older databases may hold repeats: the latest row of each pair (the
+                # session's final status) stays, the others move to attendance_duplicates.
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_attendance_session_student'"
+                )
+                if cursor.fetchone() is None:
+                    cursor.execute('''
+                        CREATE TABLE IF NOT EXISTS attendance_duplicates (
+                            id INTEGER PRIMARY KEY,
+                            student_name TEXT NOT NULL,
+                            timestamp TEXT NOT NULL,
+                            status TEXT NOT NULL,
+                            session_id TEXT,
+                            confidence REAL,
+                            ts_epoch INTEGER
+                        )
+                    ''')
+                    cursor.execute(
+                        f"INSERT OR REPLACE INTO attendance_duplicates ({_ATTENDANCE_COLUMNS}) "
+                        f"SELECT {_ATTENDANCE_COLUMNS} FROM attendance WHERE {_SQL_SESSION_DUPLICATES}"
+                    )
+                    moved = cursor.rowcount
+                    cursor.execute(f"DELETE FROM attendance WHERE {_SQL_SESSION_DUPLICATES}")
+                    if moved > 0:
+                        self.logger.info(f"Moved {moved} duplicate session attendance rows to attendance_duplicates")
+                    cursor.execute(
+                        "CREATE UNIQUE INDEX idx_attendance_session_student ON attendance(session_id, student_name)"
+                    )
+                
                 conn.commit()
                 self.logger.info("Database initialized successfully")
                 
@@ -82,8 +398,27 @@ class DatabaseManager:
             self.logger.error(f"Database initialization failed: {e}")
             raise
     
+    def begin_session(self, session_id: str):
+        """
+        Load the students already recorded for a session and their status.
+        
+        Later marks that repeat a student's stored status are dropped without
+        a database round trip.
+        
+        Args:
+            session_id: Session identifier
+        """
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(_SQL_SELECT_SESSION_STUDENTS, (session_id,)).fetchall()
+                self._marked = {(session_id, name): status for name, status in rows}
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to load session {session_id}: {e}")
+            self._marked = {}
+    
     def mark_attendance(self, student_name: str, status: str = "Present", 
-                       session_id: str = None, confidence: float = None) -> bool:
+                       session_id: str = None, confidence: float = None,
+                       timestamp: str = None) -> bool:
         """
         Mark attendance for a student.
         
@@ -92,30 +427,96 @@ class DatabaseManager:
             status: Attendance status (Present/Absent)
             session_id: Session identifier
             confidence: Face recognition confidence score
+            timestamp: "YYYY-MM-DD HH:MM:SS" local time (defaults to now)
             
         Returns:
             True if successful, False otherwise
+            
+        Raises:
+            sqlite3.Error: Only inside transaction(), so the whole block rolls back
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        try:
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO attendance (student_name, timestamp, status, session_id, confidence)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (student_name, timestamp, status, session_id, confidence))
-                conn.commit()
+        with self._lock:
+            try:
+                if self._insert_attendance([(student_name, timestamp, status, session_id, confidence)]):
+                    self.logger.info(f"Attendance marked: {student_name} - {status} at {timestamp}")
+                else:
+                    self.logger.debug(f"Attendance already recorded: {student_name} - {status}")
+                return True
                 
-            self.logger.info(f"Attendance marked: {student_name} - {status} at {timestamp}")
+            except sqlite3.Error as e:
+                self.logger.error(f"Failed to mark attendance for {student_name}: {e}")
+                if self._tx_depth:
+                    raise
+                return False
+    
+    def mark_attendance_batch(self, rows: List[Tuple[str, str, str, Optional[str], Optional[float]]]) -> bool:
+        """
+        Mark attendance for many students in a single transaction.
+        
+        Args:
+            rows: (student_name, timestamp, status, session_id, confidence) tuples
+        
+        Returns:
+            True if successful, False otherwise
+            
+        Raises:
+            sqlite3.Error: Only inside transaction(), so the whole block rolls back
+        """
+        if not rows:
             return True
+        
+        with self._lock:
+            try:
+                written = self._insert_attendance(rows)
+                self.logger.info(f"Attendance marked for {written} of {len(rows)} records")
+                return True
             
-        except sqlite3.Error as e:
-            self.logger.error(f"Failed to mark attendance for {student_name}: {e}")
-            return False
+            except sqlite3.Error as e:
+                self.logger.error(f"Failed to mark attendance batch: {e}")
+                if self._tx_depth:
+                    raise
+                return False
+    
+    def _insert_attendance(self, rows: List[Tuple[str, str, str, Optional[str], Optional[float]]]) -> int:
+        """
+        Insert attendance rows with one executemany in a single transaction.
+        
+        ts_epoch is derived from the timestamp text by _SQL_INSERT_ATTENDANCE,
+        so callers format each timestamp once and no per-row parsing happens
+        in Python.
+        
+        A student already recorded for the same session has that row updated
+        instead; rows repeating the stored status are skipped through
+        self._marked before reaching SQLite.
+        
+        Args:
+            rows: (student_name, timestamp, status, session_id, confidence) tuples
+        
+        Returns:
+            Number of rows inserted or updated
+        
+        Raises:
+            sqlite3.Error: If the insert fails; the transaction is rolled back
+        """
+        with self._lock:
+            marked = self._marked
+            rows = [row for row in rows if row[3] is None or marked.get((row[3], row[0])) != row[2]]
+            if not rows:
+                return 0
+            
+            with self._connection() as conn:
+                if UPSERT_SUPPORTED:
+                    written = conn.executemany(_SQL_INSERT_ATTENDANCE, rows).rowcount
+                else:
+                    written = _upsert_rows(conn, rows)
+            marked.update(((row[3], row[0]), row[2]) for row in rows if row[3] is not None)
+            return written
     
     def get_student_attendance(self, student_name: str, 
-                              start_date: str = None, end_date: str = None) -> List[Dict]:
+                              start_date: str = None, end_date: str = None) -> List[Tuple]:
         """
         Get attendance records for a specific student.
         
@@ -125,35 +526,31 @@ class DatabaseManager:
             end_date: End date filter (YYYY-MM-DD)
             
         Returns:
-            List of attendance records
+            List of attendance records as namedtuples (record.status, record.timestamp, ...)
         """
-        query = "SELECT * FROM attendance WHERE student_name = ?"
+        query = _SQL_SELECT_STUDENT
         params = [student_name]
         
+        # Compare the raw timestamp column so idx_attendance_name_ts is used
         if start_date:
-            query += " AND DATE(timestamp) >= ?"
+            query += " AND timestamp >= ?"
             params.append(start_date)
         
-        if end_date:
-            query += " AND DATE(timestamp) <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY timestamp DESC"
-        
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                
-                return [dict(row) for row in rows]
+            if end_date:
+                query += " AND timestamp < ?"
+                params.append(_next_day(end_date))
+            
+            query += " ORDER BY timestamp DESC"
+            
+            with self._connection() as conn:
+                return _fetch_records(conn.execute(query, params))
                 
-        except sqlite3.Error as e:
+        except (sqlite3.Error, ValueError) as e:
             self.logger.error(f"Failed to get attendance for {student_name}: {e}")
             return []
     
-    def get_daily_attendance(self, date: str = None) -> Dict[str, List[Dict]]:
+    def get_daily_attendance(self, date: str = None) -> Dict[str, List[Tuple]]:
         """
         Get attendance records for a specific date.
         
@@ -161,35 +558,52 @@ class DatabaseManager:
             date: Date in YYYY-MM-DD format (defaults to today)
             
         Returns:
-            Dictionary with student names as keys and attendance records as values
+            Dictionary with student names as keys and lists of attendance
+            record namedtuples as values
         """
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
         
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM attendance 
-                    WHERE DATE(timestamp) = ? 
-                    ORDER BY student_name, timestamp
-                ''', (date,))
-                rows = cursor.fetchall()
-                
-                attendance_dict = {}
-                for row in rows:
-                    student_name = row['student_name']
-                    if student_name not in attendance_dict:
-                        attendance_dict[student_name] = []
-                    attendance_dict[student_name].append(dict(row))
-                
-                return attendance_dict
+            with self._connection() as conn:
+                records = _fetch_records(conn.execute(_SQL_SELECT_DAILY, _day_bounds(date)))
+            
+            attendance_dict = {}
+            for record in records:
+                student_name = record.student_name
+                if student_name not in attendance_dict:
+                    attendance_dict[student_name] = []
+                attendance_dict[student_name].append(record)
+            
+            return attendance_dict
                 
-        except sqlite3.Error as e:
+        except (sqlite3.Error, ValueError) as e:
             self.logger.error(f"Failed to get daily attendance for {date}: {e}")
             return {}
     
+    def get_daily_summary(self, date: str = None) -> List[Tuple[str, str, str, int]]:
+        """
+        Get one aggregated row per student for a specific date.
+        
+        Args:
+            date: Date in YYYY-MM-DD format (defaults to today)
+            
+        Returns:
+            List of (student_name, last_timestamp, last_status, ever_present)
+            tuples ordered by student name; ever_present is 1 if any record
+            that day was Present
+        """
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+        
+        try:
+            with self._connection() as conn:
+                return conn.execute(_SQL_SELECT_DAILY_SUMMARY, _day_bounds(date)).fetchall()
+                
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.error(f"Failed to get daily summary for {date}: {e}")
+            return []
+    
     def save_attendance_report(self, session_data: Dict, format_type: str = "csv") -> str:
         """
         Save attendance report to file.
@@ -209,17 +623,16 @@ class DatabaseManager:
         if format_type in ["csv", "both"]:
             csv_file = f"{base_filename}.csv"
             try:
-                with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+                rows = [
+                    (student, data.get('status', 'Unknown'), data.get('timestamp', ''), data.get('confidence', ''))
+                    for student, data in session_data.get('students', {}).items()
+                ]
+                
+                # 1 MiB buffer so the whole report goes out in a few writes
+                with open(csv_file, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
                     writer = csv.writer(f)
                     writer.writerow(['Student Name', 'Status', 'Timestamp', 'Confidence'])
-                    
-                    for student, data in session_data.get('students', {}).items():
-                        writer.writerow([
-                            student,
-                            data.get('status', 'Unknown'),
-                            data.get('timestamp', ''),
-                            data.get('confidence', '')
-                        ])
+                    writer.writerows(rows)
                 
                 saved_files.append(csv_file)
                 self.logger.info(f"CSV report saved: {csv_file}")
@@ -230,8 +643,7 @@ class DatabaseManager:
         if format_type in ["json", "both"]:
             json_file = f"{base_filename}.json"
             try:
-                with open(json_file, 'w', encoding='utf-8') as f:
-                    json.dump(session_data, f, indent=4, ensure_ascii=False)
+                json_io.dump_file(session_data, json_file)
                 
                 saved_files.append(json_file)
                 self.logger.info(f"JSON report saved: {json_file}")
@@ -243,38 +655,44 @@ class DatabaseManager:
     
     def view_attendance_reports(self):
         """Display attendance reports in a user-friendly format."""
-        print("\n" + "=" * 60)
-        print("📊 ATTENDANCE REPORTS")
-        print("=" * 60)
+        # Lines are collected and written to stdout in one call
+        lines = [
+            "",
+            "=" * 60,
+            "📊 ATTENDANCE REPORTS",
+            "=" * 60
+        ]
         
         # Get today's attendance
         today = datetime.now().strftime("%Y-%m-%d")
-        daily_attendance = self.get_daily_attendance(today)
+        summary = self.get_daily_summary(today)
         
-        if not daily_attendance:
-            print(f"📅 No attendance records found for {today}")
+        if not summary:
+            lines.append(f"📅 No attendance records found for {today}")
+            sys.stdout.write("\n".join(lines) + "\n")
             return
         
-        print(f"📅 Attendance for {today}")
-        print("-" * 40)
+        total_students = len(summary)
+        # ever_present is already a 0/1 int from SQL; sum it without a Python-level loop
+        present_count = sum(map(itemgetter(3), summary))
         
-        total_students = len(daily_attendance)
-        present_count = sum(1 for records in daily_attendance.values() 
-                          if any(r['status'] == 'Present' for r in records))
+        lines += [
+            f"📅 Attendance for {today}",
+            "-" * 40,
+            f"👥 Total Students: {total_students}",
+            f"✅ Present: {present_count}",
+            f"❌ Absent: {total_students - present_count}",
+            f"📈 Attendance Rate: {(present_count/total_students)*100:.1f}%",
+            "",
+            "📋 Student Details:",
+            "-" * 40
+        ]
+        lines += [
+            f"{'✅' if last_status == 'Present' else '❌'} {student_name} - {last_status} ({last_timestamp})"
+            for student_name, last_timestamp, last_status, _ in summary
+        ]
         
-        print(f"👥 Total Students: {total_students}")
-        print(f"✅ Present: {present_count}")
-        print(f"❌ Absent: {total_students - present_count}")
-        print(f"📈 Attendance Rate: {(present_count/total_students)*100:.1f}%")
-        
-        print("\n📋 Student Details:")
-        print("-" * 40)
-        
-        for student_name, records in daily_attendance.items():
-            latest_record = max(records, key=lambda x: x['timestamp'])
-            status_icon = "✅" if latest_record['status'] == 'Present' else "❌"
-            print(f"{status_icon} {student_name} - {latest_record['status']} "
-                  f"({latest_record['timestamp']})")
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def cleanup_old_records(self, days_to_keep: int = 90):
         """
@@ -283,18 +701,11 @@ class DatabaseManager:
         Args:
             days_to_keep: Number of days to keep records
         """
-        cutoff_date = datetime.now().replace(day=datetime.now().day - days_to_keep)
-        cutoff_str = cutoff_date.strftime("%Y-%m-%d")
+        cutoff_str = (datetime.now() - timedelta(days=days_to_keep)).strftime("%Y-%m-%d %H:%M:%S")
         
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "DELETE FROM attendance WHERE DATE(timestamp) < ?",
-                    (cutoff_str,)
-                )
-                deleted_count = cursor.rowcount
-                conn.commit()
+            with self._connection() as conn:
+                deleted_count = conn.execute(_SQL_DELETE_BEFORE, (cutoff_str,)).rowcount
                 
             self.logger.info(f"Cleaned up {deleted_count} old attendance records")
             
@@ -304,24 +715,9 @@ class DatabaseManager:
     def get_statistics(self) -> Dict:
         """Get database statistics."""
         try:
-            with sqlite3.connect(self.db_file) as conn:
-                cursor = conn.cursor()
-                
-                # Total records
-                cursor.execute("SELECT COUNT(*) FROM attendance")
-                total_records = cursor.fetchone()[0]
-                
-                # Unique students
-                cursor.execute("SELECT COUNT(DISTINCT student_name) FROM attendance")
-                unique_students = cursor.fetchone()[0]
-                
-                # Present records
-                cursor.execute("SELECT COUNT(*) FROM attendance WHERE status = 'Present'")
-                present_records = cursor.fetchone()[0]
-                
-                # Latest record
-                cursor.execute("SELECT MAX(timestamp) FROM attendance")
-                latest_record = cursor.fetchone()[0]
+            with self._connection() as conn:
+                row = conn.execute(_SQL_STATISTICS).fetchone()
+                total_records, unique_students, present_records, latest_record = row
                 
                 return {
                     "total_records": total_records,
@@ -334,3 +730,64 @@ class DatabaseManager:
         except sqlite3.Error as e:
             self.logger.error(f"Failed to get statistics: {e}")
             return {}
+    
+    def save_encodings(self, names: List[str], encodings: np.ndarray,
+                       meta: Optional[Dict] = None) -> bool:
+        """
+        Save student face encodings as one stacked .npy matrix.
+        
+        Args:
+            names: Student names, one per encoding row
+            encodings: Face encodings, shape (N, 128)
+            meta: Extra JSON values stored with the names, checked by load_encodings
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        paths = self._encodings_paths()
+        if paths is None:
+            return False
+        matrix_file, names_file = paths
+        matrix = np.ascontiguousarray(encodings, dtype=np.float32).reshape(len(names), -1)
+        try:
+            np.save(matrix_file, matrix)
+            json_io.dump_file({"names": list(names), **(meta or {})}, names_file)
+            self.logger.info(f"Encodings saved to: {matrix_file}")
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.error(f"Failed to save encodings: {e}")
+            return False
+    
+    def load_encodings(self, meta: Optional[Dict] = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Load saved student face encodings.
+        
+        The matrix is memory-mapped, so loading costs no copy and the OS
+        page cache keeps it warm between runs.
+        
+        Args:
+            meta: Values that must match the ones passed to save_encodings
+            
+        Returns:
+            Tuple of (names, encodings); empty if nothing matching was saved
+        """
+        empty = ([], np.empty((0, 128), dtype=np.float32))
+        paths = self._encodings_paths()
+        if paths is None:
+            return empty
+        matrix_file, names_file = paths
+        if not (os.path.exists(matrix_file) and os.path.exists(names_file)):
+            return empty
+        
+        try:
+            saved = json_io.load_file(names_file)
+            if any(saved.get(key) != value for key, value in (meta or {}).items()):
+                return empty
+            names = saved["names"]
+            matrix = np.load(matrix_file, mmap_mode='r')
+            if matrix.shape != (len(names), 128):
+                return empty
+            return names, matrix
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"Failed to load encodings: {e}")
+            return empty
@@ -0,0 +1,234 @@
+"""
+Fast face-distance kernels for the Smart Attendance System
+"""
+
+import ctypes
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import cupy as cp
+    CUPY_AVAILABLE = True
+except ImportError:
+    CUPY_AVAILABLE = False
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+ENCODING_DIM = 128
+
+# Above this many known faces faiss switches to an approximate HNSW index
+HNSW_THRESHOLD = 10000
+
+
+def _load_native_kernel() -> Optional[ctypes.CDLL]:
+    """Load the compiled _face_distance.c kernel if it has been built."""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    for suffix in (".so", ".dylib", ".dll"):
+        path = os.path.join(module_dir, "_face_distance" + suffix)
+        if not os.path.exists(path):
+            continue
+        try:
+            lib = ctypes.CDLL(path)
+        except OSError:
+            continue
+        lib.best_match.restype = ctypes.c_float
+        lib.best_match.argtypes = [
+            np.ctypeslib.ndpointer(np.float32, ndim=2, flags="C_CONTIGUOUS"),
+            np.ctypeslib.ndpointer(np.float32, ndim=1, flags="C_CONTIGUOUS"),
+            ctypes.c_int,
+            ctypes.POINTER(ctypes.c_int),
+        ]
+        return lib
+    return None
+
+
+_native = _load_native_kernel()
+NATIVE_AVAILABLE = _native is not None
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _best_match_kernel(known, probe):
+        n = known.shape[0]
+        distances = np.empty(n, dtype=np.float32)
+
+        # Squared Euclidean distance per known row, spread across threads
+        for i in prange(n):
+            s = np.float32(0.0)
+            for k in range(ENCODING_DIM):
+                d = known[i, k] - probe[k]
+                s += d * d
+            distances[i] = s
+
+        # argmin is a cheap serial pass over n floats
+        best_index = -1
+        best = np.float32(np.inf)
+        for i in range(n):
+            if distances[i] < best:
+                best = distances[i]
+                best_index = i
+        return best_index, best
+
+
+def best_match(known: np.ndarray, probe: np.ndarray) -> Tuple[int, float]:
+    """
+    Find the closest known encoding to a probe encoding.
+
+    Args:
+        known: Known encodings, C-contiguous float32 array of shape (N, 128)
+        probe: Encoding to match, float32 array of shape (128,)
+
+    Returns:
+        Tuple of (best_index, squared_distance); best_index is -1 when known is empty
+    """
+    if known.shape[0] == 0:
+        return -1, float("inf")
+
+    probe = np.ascontiguousarray(probe, dtype=np.float32).ravel()
+
+    if NATIVE_AVAILABLE:
+        index = ctypes.c_int(-1)
+        distance_sq = _native.best_match(known, probe, known.shape[0], ctypes.byref(index))
+        return index.value, float(distance_sq)
+
+    if NUMBA_AVAILABLE:
+        index, distance_sq = _best_match_kernel(known, probe)
+        return int(index), float(distance_sq)
+
+    diff = known - probe
+    distances = np.einsum('ij,ij->i', diff, diff)
+    index = int(distances.argmin())
+    return index, float(distances[index])
+
+
+def batch_best_match(known: np.ndarray, known_sq: np.ndarray,
+                     probes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the closest known encoding for every probe with one matrix multiply.
+
+    Distances are computed as sqrt(||K||^2 + ||P||^2 - 2 K.P^T), so a single
+    BLAS call covers all probes of a frame.
+
+    Args:
+        known: Known encodings, float32 array of shape (N, 128), N > 0
+        known_sq: Squared norms of the known rows, shape (N,)
+        probes: Encodings to match, shape (F, 128)
+
+    Returns:
+        Tuple of (best_indices, distances) arrays of shape (F,)
+    """
+    P = np.ascontiguousarray(probes, dtype=np.float32).reshape(len(probes), -1)
+    ps = np.einsum('ij,ij->i', P, P)
+    d2 = known_sq[:, None] + ps[None, :] - 2.0 * (known @ P.T)
+
+    # Best match per probe (column)
+    idx = d2.argmin(axis=0)
+    distances = np.sqrt(np.maximum(d2[idx, np.arange(P.shape[0])], 0))
+    return idx, distances
+
+
+def dlib_cuda_available() -> bool:
+    """Check whether dlib was built with CUDA support."""
+    try:
+        import dlib
+    except ImportError:
+        return False
+    return bool(getattr(dlib, "DLIB_USE_CUDA", False))
+
+
+class GpuMatcher:
+    """Keeps the known encodings on the GPU and matches whole frames there."""
+
+    def __init__(self, known: np.ndarray):
+        """
+        Upload known encodings to the GPU.
+
+        Args:
+            known: Known encodings, float32 array of shape (N, 128), N > 0
+        """
+        self._stream = cp.cuda.Stream(non_blocking=True)
+        with self._stream:
+            self._known = cp.asarray(known, dtype=cp.float32)
+            self._known_sq = (self._known * self._known).sum(axis=1)
+        self._stream.synchronize()
+
+    def match(self, probes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the closest known encoding for every probe on the GPU.
+
+        Args:
+            probes: Encodings to match, shape (F, 128)
+
+        Returns:
+            Tuple of (best_indices, distances) NumPy arrays of shape (F,)
+        """
+        with self._stream:
+            P = cp.asarray(probes, dtype=cp.float32).reshape(len(probes), -1)
+            d2 = self._known_sq[:, None] + (P * P).sum(axis=1)[None, :] - 2.0 * (self._known @ P.T)
+            idx = d2.argmin(axis=0)
+            distances = cp.sqrt(cp.maximum(d2[idx, cp.arange(P.shape[0])], 0))
+            idx, distances = cp.asnumpy(idx, stream=self._stream), cp.asnumpy(distances, stream=self._stream)
+        self._stream.synchronize()
+        return idx, distances
+
+
+class FaissMatcher:
+    """Matches whole frames against a faiss index of the known encodings."""
+
+    def __init__(self, known: np.ndarray):
+        """
+        Build the faiss index.
+
+        Uses an exact IndexFlatL2 and, for very large enrollments, an
+        IndexHNSWFlat whose query cost grows logarithmically with N.
+
+        Args:
+            known: Known encodings, float32 array of shape (N, 128), N > 0
+        """
+        if known.shape[0] > HNSW_THRESHOLD:
+            self._index = faiss.IndexHNSWFlat(ENCODING_DIM, 32)
+            self._index.hnsw.efSearch = 32
+        else:
+            self._index = faiss.IndexFlatL2(ENCODING_DIM)
+        self._index.add(np.ascontiguousarray(known, dtype=np.float32))
+
+    def match(self, probes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the closest known encoding for every probe.
+
+        Args:
+            probes: Encodings to match, shape (F, 128)
+
+        Returns:
+            Tuple of (best_indices, distances) arrays of shape (F,)
+        """
+        P = np.ascontiguousarray(probes, dtype=np.float32).reshape(len(probes), -1)
+        D, I = self._index.search(P, 1)
+        return I[:, 0], np.sqrt(np.maximum(D[:, 0], 0))
+
+
+def warm_up(known: np.ndarray):
+    """
+    Compile the matching kernel ahead of the first processed frame.
+
+    Numba compiles a separate version for read-only arrays such as the
+    memory-mapped encodings cache, so the kernel is warmed with a row of
+    the actual known matrix rather than a fresh writable array.
+
+    Args:
+        known: Known encodings the session will match against, shape (N, 128)
+    """
+    if NUMBA_AVAILABLE and not NATIVE_AVAILABLE and known.shape[0]:
+        _best_match_kernel(known[:1], np.zeros(ENCODING_DIM, dtype=np.float32))
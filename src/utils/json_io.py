@@ -0,0 +1,83 @@
+"""
+JSON file helpers for the Smart Attendance System
+"""
+
+import json
+from typing import Any
+
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def loads(data: bytes) -> Any:
+    """
+    Parse JSON from UTF-8 bytes.
+
+    Args:
+        data: Raw file contents
+
+    Returns:
+        Parsed object
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON (orjson's error subclasses it)
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _default(obj: Any) -> Any:
+    """Convert NumPy scalars and arrays for the json module, as orjson does."""
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize an object to indented UTF-8 JSON.
+
+    NumPy scalars and arrays are written as plain numbers and lists with
+    or without orjson.
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        Encoded JSON document
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, indent=2, ensure_ascii=False, default=_default).encode("utf-8")
+
+
+def load_file(path: str) -> Any:
+    """
+    Read and parse a JSON file in binary mode.
+
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        Parsed object
+    """
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(obj: Any, path: str):
+    """
+    Serialize an object and write it to a JSON file in binary mode.
+
+    Args:
+        obj: Object to serialize
+        path: Path to the JSON file
+    """
+    with open(path, "wb") as f:
+        f.write(dumps(obj))
@@ -3,15 +3,28 @@ Logging configuration for the Smart Attendance System
 """
 
 import logging
+import logging.handlers
 import os
 from datetime import datetime
 from typing import Optional
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Log file rotation and in-process buffering
+LOG_MAX_BYTES = 10_000_000
+LOG_BACKUP_COUNT = 3
+LOG_BUFFER_RECORDS = 1024
+
 
 def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None):
     """
     Setup logging configuration for the application.
     
+    File records are buffered in memory and written to a rotating log file
+    in batches of LOG_BUFFER_RECORDS, or immediately for ERROR and above.
+    Call logging.shutdown() on exit to flush the buffer.
+    
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Path to log file (optional)
@@ -19,45 +32,53 @@ def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None):
     # Create logs directory if it doesn't exist
     if log_file:
         log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
+        if log_dir:
             os.makedirs(log_dir, exist_ok=True)
     
-    # Configure logging format
-    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    date_format = '%Y-%m-%d %H:%M:%S'
+    # Resolve the level and build the formatter once for all handlers
+    level = getattr(logging, log_level.upper())
+    formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
     
     # Set up handlers
     handlers = []
     
     # Console handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(getattr(logging, log_level.upper()))
-    console_formatter = logging.Formatter(log_format, date_format)
-    console_handler.setFormatter(console_formatter)
+    console_handler.setLevel(level)
+    console_handler.setFormatter(formatter)
     handlers.append(console_handler)
     
     # File handler (if specified)
     if log_file:
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(getattr(logging, log_level.upper()))
-        file_formatter = logging.Formatter(log_format, date_format)
-        file_handler.setFormatter(file_formatter)
-        handlers.append(file_handler)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(formatter)
+        
+        # Records are filtered by level before they are buffered
+        memory_handler = logging.handlers.MemoryHandler(
+            LOG_BUFFER_RECORDS,
+            flushLevel=logging.ERROR,
+            target=file_handler
+        )
+        memory_handler.setLevel(level)
+        handlers.append(memory_handler)
     
     # Configure root logger
     logging.basicConfig(
-        level=getattr(logging, log_level.upper()),
-        format=log_format,
-        datefmt=date_format,
+        level=level,
         handlers=handlers,
         force=True  # Override any existing configuration
     )
     
     # Log initialization
     logger = logging.getLogger(__name__)
-    logger.info(f"Logging initialized with level: {log_level}")
+    logger.info("Logging initialized with level: %s", log_level)
     if log_file:
-        logger.info(f"Log file: {log_file}")
+        logger.info("Log file: %s", log_file)
 
 
 class AttendanceLogger:
@@ -68,25 +89,27 @@ class AttendanceLogger:
     
     def log_attendance_marked(self, student_name: str, timestamp: str):
         """Log when attendance is marked for a student."""
-        self.logger.info(f"Attendance marked for {student_name} at {timestamp}")
+        self.logger.info("Attendance marked for %s at %s", student_name, timestamp)
     
     def log_unknown_face(self, timestamp: str = None):
         """Log when an unknown face is detected."""
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
         if timestamp is None:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.logger.warning(f"Unknown face detected at {timestamp}")
+        self.logger.warning("Unknown face detected at %s", timestamp)
     
     def log_system_error(self, error: str, context: str = ""):
         """Log system errors."""
-        self.logger.error(f"System error in {context}: {error}")
+        self.logger.error("System error in %s: %s", context, error)
     
     def log_attendance_session_start(self, student_count: int):
         """Log when attendance session starts."""
-        self.logger.info(f"Attendance session started with {student_count} registered students")
+        self.logger.info("Attendance session started with %d registered students", student_count)
     
     def log_attendance_session_end(self, present_count: int, total_count: int):
         """Log when attendance session ends."""
-        self.logger.info(f"Attendance session ended: {present_count}/{total_count} students present")
+        self.logger.info("Attendance session ended: %d/%d students present", present_count, total_count)
 
 
 class ChatbotLogger:
@@ -97,15 +120,16 @@ class ChatbotLogger:
     
     def log_query(self, query: str, response: str, response_time: float = None):
         """Log chatbot queries and responses."""
-        message = f"Query: '{query}' -> Response: '{response}'"
-        if response_time:
-            message += f" (Response time: {response_time:.2f}s)"
-        self.logger.info(message)
+        if response_time is None:
+            self.logger.info("Query: '%s' -> Response: '%s'", query, response)
+        else:
+            self.logger.info("Query: '%s' -> Response: '%s' (Response time: %.2fs)",
+                             query, response, response_time)
     
     def log_unknown_query(self, query: str):
         """Log unknown queries."""
-        self.logger.warning(f"Unknown query received: '{query}'")
+        self.logger.warning("Unknown query received: '%s'", query)
     
     def log_faq_loaded(self, faq_count: int):
         """Log when FAQ data is loaded."""
-        self.logger.info(f"FAQ data loaded with {faq_count} entries")
+        self.logger.info("FAQ data loaded with %d entries", faq_count)
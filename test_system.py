@@ -1,172 +1,482 @@
 #!/usr/bin/env python3
 """
-Simple test script for Smart Attendance System
-Run this to verify all components are working correctly
+System tests for Smart Attendance System
+Run with pytest (pip install -r requirements-dev.txt) to verify all
+components are working correctly:
+
+    pytest test_system.py                     # all tests
+    pytest -n auto test_system.py             # in parallel (needs pytest-xdist)
+    pytest -m "not hardware" test_system.py   # skip tests that need a camera
 """
 
-import sys
-import os
+import sqlite3
+
+import pytest
+
 
 def test_imports():
     """Test if all required modules can be imported."""
-    print("🧪 Testing imports...")
+    import cv2
+    import face_recognition
+    import numpy as np
     
-    try:
-        import cv2
-        print("✅ OpenCV imported successfully")
-    except ImportError as e:
-        print(f"❌ OpenCV import failed: {e}")
-        return False
+    from src.utils.config import Config
+    from src.utils.database import DatabaseManager
+    from src.utils.logger import setup_logging
+
+
+@pytest.mark.hardware
+def test_camera():
+    """Test camera access."""
+    import cv2
     
+    cap = cv2.VideoCapture(0)
     try:
-        import face_recognition
-        print("✅ face_recognition imported successfully")
-    except ImportError as e:
-        print(f"❌ face_recognition import failed: {e}")
-        return False
+        assert cap.isOpened(), "Camera access failed"
+    finally:
+        cap.release()
+
+
+class _StubCapture:
+    """Opened capture that accepts every property without a device."""
     
-    try:
+    def isOpened(self):
+        return True
+    
+    def set(self, prop, value):
+        return True
+    
+    def get(self, prop):
+        return 0
+    
+    def release(self):
+        pass
+
+
+class _StubGrabber:
+    """Grabber that times out once, returns a few frames, then fails."""
+    
+    def __init__(self, cap):
         import numpy as np
-        print("✅ NumPy imported successfully")
-    except ImportError as e:
-        print(f"❌ NumPy import failed: {e}")
-        return False
+        
+        self.failed = False
+        self._results = [None] + [np.zeros((48, 64, 3), dtype=np.uint8) for _ in range(3)]
     
-    try:
-        from src.utils.config import Config
-        from src.utils.database import DatabaseManager
-        from src.utils.logger import setup_logging
-        print("✅ Local modules imported successfully")
-    except ImportError as e:
-        print(f"❌ Local module import failed: {e}")
-        return False
+    def start(self):
+        pass
     
-    return True
+    def stop(self):
+        pass
+    
+    def get_latest(self, timeout=2.0):
+        if not self._results:
+            self.failed = True
+            return None
+        return self._results.pop(0)
 
-def test_camera():
-    """Test camera access."""
-    print("\n📸 Testing camera access...")
+
+def test_attendance_loop_survives_frame_timeout(app_config, monkeypatch):
+    """A frame timeout keeps the session running; only a read failure ends it."""
+    pytest.importorskip("face_recognition")
+    import numpy as np
+    from src import attendance_system
     
-    try:
-        import cv2
-        cap = cv2.VideoCapture(0)
-        if cap.isOpened():
-            print("✅ Camera access successful")
-            cap.release()
-            return True
-        else:
-            print("❌ Camera access failed")
-            return False
-    except Exception as e:
-        print(f"❌ Camera test failed: {e}")
-        return False
+    shown = []
+    monkeypatch.setattr(attendance_system, "FrameGrabber", _StubGrabber)
+    monkeypatch.setattr(attendance_system.cv2, "VideoCapture", lambda index: _StubCapture())
+    monkeypatch.setattr(attendance_system.cv2, "imshow", lambda title, frame: shown.append(frame))
+    monkeypatch.setattr(attendance_system.cv2, "waitKey", lambda delay: 0xFF)
+    monkeypatch.setattr(attendance_system.cv2, "destroyAllWindows", lambda: None)
+    monkeypatch.setattr(attendance_system.face_recognition, "face_locations", lambda *args, **kwargs: [])
+    
+    system = attendance_system.AttendanceSystem(app_config)
+    system.db_manager.initialize()
+    monkeypatch.setattr(system, "_load_cached_encodings",
+                        lambda: (np.zeros((1, 128), dtype=np.float32), ["Alice"]))
+    errors = []
+    monkeypatch.setattr(system.logger, "log_system_error",
+                        lambda message, context: errors.append((message, len(shown))))
+    
+    system.start_attendance()
+    
+    assert len(shown) == 3
+    assert errors == [("Failed to read camera frame", 3)]
+
 
 def test_database():
     """Test database initialization."""
-    print("\n💾 Testing database...")
+    from src.utils.database import DatabaseManager
     
+    # In-memory database: no disk I/O and nothing to clean up
+    db = DatabaseManager(":memory:")
     try:
-        from src.utils.database import DatabaseManager
-        
-        # Test with temporary database
-        db = DatabaseManager("test_attendance.db")
         db.initialize()
-        print("✅ Database initialization successful")
+        assert db.mark_attendance("Test Student")
+        assert db.get_statistics()["total_records"] == 1
+    finally:
+        db.close()
+
+
+def _session_rows(db, session_id):
+    """(student_name, status, timestamp) rows stored for a session."""
+    with db._connection() as conn:
+        return conn.execute(
+            "SELECT student_name, status, timestamp FROM attendance "
+            "WHERE session_id = ? ORDER BY student_name",
+            (session_id,)
+        ).fetchall()
+
+
+def test_session_attendance_dedup(caplog, sqlite_upsert):
+    """A student keeps one row per session; repeated marks neither insert nor log."""
+    import logging
+    from src.utils.database import DatabaseManager
+    
+    db = DatabaseManager(":memory:")
+    try:
+        db.initialize()
+        db.begin_session("s1")
+        rows = [("Alice", "2024-01-15 09:00:00", "Present", "s1", 0.9)]
+        assert db.mark_attendance_batch(rows)
+        assert db.mark_attendance_batch(rows + [("Alice", "2024-01-15 09:01:00", "Present", "s1", 0.8)])
         
-        # Clean up test database
-        if os.path.exists("test_attendance.db"):
-            os.remove("test_attendance.db")
+        with caplog.at_level(logging.INFO, logger="database"):
+            assert db.mark_attendance("Alice", session_id="s1")
+        assert "Attendance marked" not in caplog.text
         
-        return True
-    except Exception as e:
-        print(f"❌ Database test failed: {e}")
-        return False
+        # Rows without a session are never deduplicated
+        assert db.mark_attendance("Alice")
+        assert db.mark_attendance("Alice")
+        
+        assert _session_rows(db, "s1") == [("Alice", "Present", "2024-01-15 09:00:00")]
+        assert db.get_statistics()["total_records"] == 3
+    finally:
+        db.close()
 
-def test_config():
-    """Test configuration loading."""
-    print("\n⚙️ Testing configuration...")
+
+def test_session_reset_then_finalize(sqlite_upsert):
+    """After a reset, the final Absent status replaces the earlier Present row."""
+    from src.utils.database import DatabaseManager
     
+    db = DatabaseManager(":memory:")
     try:
-        from src.utils.config import Config
+        db.initialize()
+        db.begin_session("s1")
+        db.mark_attendance_batch([("Alice", "2024-01-15 09:00:00", "Present", "s1", 0.9)])
         
-        config = Config()
-        print("✅ Configuration loaded successfully")
-        print(f"   - Database file: {config.database_file}")
-        print(f"   - Student images folder: {config.student_images_folder}")
-        print(f"   - Face threshold: {config.face_threshold}")
+        # Alice was reset and not seen again; Bob was never seen
+        db.mark_attendance_batch([
+            ("Alice", "2024-01-15 10:00:00", "Absent", "s1", None),
+            ("Bob", "2024-01-15 10:00:00", "Absent", "s1", None),
+        ])
+        assert _session_rows(db, "s1") == [
+            ("Alice", "Absent", "2024-01-15 10:00:00"),
+            ("Bob", "Absent", "2024-01-15 10:00:00"),
+        ]
         
-        return True
-    except Exception as e:
-        print(f"❌ Configuration test failed: {e}")
-        return False
+        # A later session for the same database starts from the stored statuses
+        db.begin_session("s1")
+        db.mark_attendance_batch([("Alice", "2024-01-15 10:05:00", "Present", "s1", 0.7)])
+        assert _session_rows(db, "s1")[0] == ("Alice", "Present", "2024-01-15 10:05:00")
+    finally:
+        db.close()
 
-def test_chatbot():
-    """Test chatbot functionality."""
-    print("\n🤖 Testing chatbot...")
+
+def test_transaction_commits_once(tmp_path):
+    """Work inside transaction(), nested blocks included, is committed at the outer exit."""
+    from src.utils.database import DatabaseManager
     
+    db_file = str(tmp_path / "tx.db")
+    db = DatabaseManager(db_file)
     try:
-        from src.chatbot import FAQChatbot
-        from src.utils.config import Config
+        db.initialize()
+        with db.transaction():
+            db.mark_attendance("Alice", session_id="s1")
+            with db.transaction():
+                db.mark_attendance_batch([("Bob", "2024-01-15 09:00:00", "Present", "s1", None)])
+            
+            # The nested block and the methods' own commits must not end the transaction
+            reader = sqlite3.connect(db_file)
+            assert reader.execute("SELECT COUNT(*) FROM attendance").fetchone() == (0,)
+            reader.close()
         
-        config = Config()
-        chatbot = FAQChatbot(config)
+        assert db.get_statistics()["total_records"] == 2
+    finally:
+        db.close()
+
+
+def test_transaction_rolls_back_on_error():
+    """An exception, or a failed insert, inside transaction() discards the whole block."""
+    from src.utils.database import DatabaseManager
+    
+    db = DatabaseManager(":memory:")
+    try:
+        db.initialize()
+        db.begin_session("s1")
         
-        # Test FAQ loading
-        if chatbot.faq_data:
-            print(f"✅ FAQ data loaded successfully ({len(chatbot.faq_data)} entries)")
-        else:
-            print("⚠️ No FAQ data found")
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.mark_attendance("Alice", session_id="s1")
+                raise RuntimeError("abort")
+        assert db.get_statistics()["total_records"] == 0
         
-        # Test response generation
-        response = chatbot.get_response("attendance")
-        if response:
-            print("✅ Chatbot response generation successful")
-        else:
-            print("❌ Chatbot response generation failed")
+        # student_name is NOT NULL: the batch fails and must not be committed partially
+        with pytest.raises(sqlite3.IntegrityError):
+            with db.transaction():
+                db.mark_attendance("Alice", session_id="s1")
+                db.mark_attendance_batch([(None, "2024-01-15 09:00:00", "Present", "s1", None)])
+        assert db.get_statistics()["total_records"] == 0
         
-        return True
-    except Exception as e:
-        print(f"❌ Chatbot test failed: {e}")
-        return False
-
-def main():
-    """Run all tests."""
-    print("🚀 Smart Attendance System - System Test")
-    print("=" * 50)
-    
-    tests = [
-        test_imports,
-        test_config,
-        test_database,
-        test_camera,
-        test_chatbot
-    ]
+        # The rolled-back marks must not be treated as stored
+        assert db.mark_attendance("Alice", session_id="s1")
+        assert db.get_statistics()["total_records"] == 1
+        
+        # Outside a transaction a failed insert is reported, not raised
+        assert not db.mark_attendance_batch([(None, "2024-01-15 09:00:00", "Present", None, None)])
+    finally:
+        db.close()
+
+
+def test_session_dedup_migration(tmp_path):
+    """Upgrading an old database keeps each pair's latest row and archives the rest."""
+    from src.utils.database import DatabaseManager
+    
+    db_file = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_file)
+    conn.execute('''
+        CREATE TABLE attendance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_name TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            status TEXT NOT NULL,
+            session_id TEXT,
+            confidence REAL
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO attendance (student_name, timestamp, status, session_id, confidence) VALUES (?, ?, ?, ?, ?)",
+        [
+            ("Alice", "2024-01-15 09:00:00", "Present", "s1", 0.9),
+            ("Alice", "2024-01-15 10:00:00", "Absent", "s1", None),
+            ("Bob", "2024-01-15 10:00:00", "Absent", "s1", None),
+            ("Alice", "2024-01-15 11:00:00", "Present", None, None),
+            ("Alice", "2024-01-15 11:30:00", "Present", None, None),
+        ]
+    )
+    conn.commit()
+    conn.close()
+    
+    db = DatabaseManager(db_file)
+    try:
+        db.initialize()
+        assert _session_rows(db, "s1") == [
+            ("Alice", "Absent", "2024-01-15 10:00:00"),
+            ("Bob", "Absent", "2024-01-15 10:00:00"),
+        ]
+        assert db.get_statistics()["total_records"] == 4
+        with db._connection() as conn:
+            archived = conn.execute(
+                "SELECT student_name, status, timestamp FROM attendance_duplicates"
+            ).fetchall()
+        assert archived == [("Alice", "Present", "2024-01-15 09:00:00")]
+        
+        # A second start finds the index and leaves the data alone
+        db.initialize()
+        assert db.get_statistics()["total_records"] == 4
+    finally:
+        db.close()
+
+
+def test_best_match_agrees_with_batch():
+    """The single-face kernel (native, Numba or NumPy) must pick the batched GEMM's match."""
+    import numpy as np
+    from src.utils import fast_distance
     
-    passed = 0
-    total = len(tests)
+    rng = np.random.default_rng(0)
+    known = rng.normal(0, 0.1, (257, 128)).astype(np.float32)
+    known_sq = np.einsum('ij,ij->i', known, known)
+    probes = rng.normal(0, 0.1, (32, 128)).astype(np.float32)
     
-    for test in tests:
-        if test():
-            passed += 1
+    batch_idx, batch_dist = fast_distance.batch_best_match(known, known_sq, probes)
+    for probe, expected_idx, expected_dist in zip(probes, batch_idx, batch_dist):
+        index, distance_sq = fast_distance.best_match(known, probe)
+        assert index == expected_idx
+        assert abs(np.sqrt(distance_sq) - expected_dist) < 1e-4
     
-    print("\n" + "=" * 50)
-    print(f"📊 Test Results: {passed}/{total} tests passed")
+    assert fast_distance.best_match(known[:0], probes[0])[0] == -1
+
+
+def test_warm_up_covers_read_only_cache(tmp_path, monkeypatch):
+    """Warming on the memory-mapped cache leaves nothing to compile on the first frame."""
+    import numpy as np
+    from src.utils import fast_distance
     
-    if passed == total:
-        print("🎉 All tests passed! System is ready to use.")
-        print("\n💡 Next steps:")
-        print("   1. Add student images to data/student_images/ folder")
-        print("   2. Run: python main.py")
-        print("   3. Test attendance system and chatbot")
+    if not fast_distance.NUMBA_AVAILABLE:
+        pytest.skip("numba is not installed")
+    monkeypatch.setattr(fast_distance, "NATIVE_AVAILABLE", False)
+    
+    # The encodings cache is loaded as a read-only memmap
+    cache_file = str(tmp_path / "encodings.npy")
+    np.save(cache_file, np.random.default_rng(0).normal(0, 0.1, (8, 128)).astype(np.float32))
+    known = np.load(cache_file, mmap_mode="r")
+    assert not known.flags.writeable
+    
+    fast_distance.warm_up(known)
+    signatures = list(fast_distance._best_match_kernel.signatures)
+    
+    # Probes arrive as float64 encodings, as face_recognition returns them
+    fast_distance.best_match(known, np.asarray(known[3], dtype=np.float64))
+    assert fast_distance._best_match_kernel.signatures == signatures
+
+
+def test_config(app_config, tmp_path):
+    """Test configuration loading."""
+    from src.utils.config import Config
+    
+    # A missing config file is created with the defaults
+    assert (tmp_path / "config.json").exists()
+    
+    config = Config(app_config.config_file)
+    assert config.database_file == str(tmp_path / "data" / "attendance.db")
+    assert config.student_images_folder
+    assert config.face_threshold > 0
+
+
+@pytest.mark.parametrize("scale", [0, -0.5, 1.5, "fast"])
+def test_config_rejects_bad_detection_downscale(tmp_path, scale):
+    """Out-of-range detection_downscale values fall back to the default."""
+    import json
+    from src.utils.config import Config, DEFAULT_DETECTION_DOWNSCALE
+    
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"detection_downscale": scale}))
+    assert Config(str(config_file)).detection_downscale == DEFAULT_DETECTION_DOWNSCALE
+
+
+@pytest.mark.parametrize("use_orjson", [True, False], ids=["orjson", "json"])
+def test_json_dumps_numpy_values(monkeypatch, use_orjson):
+    """NumPy scalars and arrays serialize the same with and without orjson."""
+    import numpy as np
+    from src.utils import json_io
+    
+    if use_orjson and not json_io.ORJSON_AVAILABLE:
+        pytest.skip("orjson is not installed")
+    monkeypatch.setattr(json_io, "ORJSON_AVAILABLE", use_orjson)
+    
+    data = {
+        "confidence": np.float32(0.75),
+        "count": np.int64(3),
+        "present": np.bool_(True),
+        "encoding": np.arange(4, dtype=np.float64) / 2,
+        "name": "Zoë"
+    }
+    assert json_io.loads(json_io.dumps(data)) == {
+        "confidence": 0.75,
+        "count": 3,
+        "present": True,
+        "encoding": [0.0, 0.5, 1.0, 1.5],
+        "name": "Zoë"
+    }
+    
+    with pytest.raises(TypeError):
+        json_io.dumps({"unsupported": object()})
+
+
+def _faq_entry(keywords):
+    """Minimal FAQ entry with the given keywords."""
+    return {"keywords": keywords, "answer": "Answer: " + " ".join(keywords), "category": "general"}
+
+
+def test_faq_match_tie_breaks_on_file_order(app_config):
+    """On equal scores the first FAQ entry wins, as in the original linear scan."""
+    from src.chatbot import FAQChatbot
+    
+    chatbot = FAQChatbot(app_config)
+    chatbot.synonyms = {"quiz": ["quiz", "test"]}
+    
+    # "alpha" scores 1/2 as a keyword; "quiz" scores 0.5/1 through the synonym "test"
+    faq = {"first": _faq_entry(["alpha", "beta"]), "second": _faq_entry(["test"])}
+    chatbot.faq_data = faq
+    assert chatbot.find_best_match("alpha quiz") == ("first", 0.5)
+    
+    chatbot.faq_data = dict(reversed(list(faq.items())))
+    assert chatbot.find_best_match("alpha quiz") == ("second", 0.5)
+    
+    # Identical keyword sets tie as well
+    chatbot.faq_data = {"a": _faq_entry(["exam", "date"]), "b": _faq_entry(["date", "exam"])}
+    assert chatbot.find_best_match("exam date")[0] == "a"
+
+
+def test_faq_match_confidence_threshold(app_config):
+    """A score of exactly 0.3 falls back; the old float sum 0.2 + 0.1 still answers."""
+    from src.chatbot import FAQChatbot
+    
+    chatbot = FAQChatbot(app_config)
+    chatbot.synonyms = {"quiz": ["quiz", "k2"]}
+    keywords = ["k%d" % i for i in range(1, 11)]
+    chatbot.faq_data = {
+        "ten": _faq_entry(keywords),
+        "five": _faq_entry(["k1", "k2", "x3", "x4", "x5"])
+    }
+    
+    # 3 of 10 keywords: exactly 0.3, which is not above the threshold
+    best, score = chatbot.find_best_match("k1 k3 k4")
+    assert (best, score) == ("ten", 0.3)
+    assert not chatbot.get_response("k1 k3 k4").startswith("Answer:")
+    
+    # 1/5 keyword share plus one 0.5/5 synonym hit sums to 0.30000000000000004
+    best, score = chatbot.find_best_match("x3 quiz")
+    assert (best, score) == ("five", 1 / 5 + 0.5 / 5)
+    assert score > 0.3
+    assert chatbot.get_response("x3 quiz").startswith("Answer: k1 k2 x3")
+
+
+@pytest.mark.parametrize("backend", ["numba", "numpy"])
+def test_faq_batch_match_agrees_with_single(app_config, monkeypatch, backend):
+    """find_best_match_batch returns find_best_match's result for every query, on both backends."""
+    from src import chatbot as chatbot_module
+    
+    if backend == "numba":
+        if not chatbot_module.NUMBA_AVAILABLE:
+            pytest.skip("numba is not installed")
+        assert chatbot_module._get_score_batch_kernel() is not None
     else:
-        print("❌ Some tests failed. Please check the error messages above.")
-        print("\n🔧 Troubleshooting:")
-        print("   1. Install dependencies: pip install -r requirements.txt")
-        print("   2. Check camera permissions")
-        print("   3. Ensure all files are in correct locations")
+        monkeypatch.setattr(chatbot_module, "_get_score_batch_kernel", lambda: None)
+    
+    chatbot = chatbot_module.FAQChatbot(app_config)
+    faq = dict(chatbot.faq_data)
+    faq.update({
+        "tie_first": _faq_entry(["alpha", "omega"]),
+        "tie_second": _faq_entry(["omega", "alpha"]),
+        "ten": _faq_entry(["k%d" % i for i in range(1, 11)]),
+    })
+    chatbot.faq_data = faq
     
-    return passed == total
+    queries = [
+        # Default FAQ entries, with and without synonyms
+        "How do I mark my attendance?", "when is the next exam", "library book fine",
+        "Where can I park my car?", "I need help, who do I contact?", "sick leave quiz grade",
+        # Ties between identical keyword sets
+        "alpha omega", "omega", "ALPHA!",
+        # Empty and punctuation-only queries
+        "", "   ", "?!.,", "...",
+        # At or below the 0.3 threshold, and no match at all
+        "k1 k3 k4", "k1", "k2 k5", "completely unrelated words",
+    ]
+    assert chatbot.find_best_match_batch(queries) == [chatbot.find_best_match(query) for query in queries]
+    assert chatbot.find_best_match_batch([]) == []
+
 
-if __name__ == "__main__":
-    success = main()
-    sys.exit(0 if success else 1)
+def test_chatbot(app_config, tmp_path):
+    """Test chatbot functionality."""
+    from src.chatbot import FAQChatbot
+    
+    chatbot = FAQChatbot(app_config)
+    
+    # Test FAQ loading; the default FAQ is written under tmp_path, not data/
+    assert chatbot.faq_data, "No FAQ data found"
+    assert (tmp_path / "data" / "faq.json").exists()
+    
+    # Test response generation
+    response = chatbot.get_response("attendance")
+    assert response, "Chatbot response generation failed"